@@ -0,0 +1,249 @@
+"""
+Benchmarks for lfg_calc_py. Synthetic method configs are built from the
+example method yamls, scaling the landfill lifespan, the number of
+materials, and the number of facilities. Wall time and peak memory of each
+case are written to a json results file, which can be compared against a
+stored baseline.
+
+python benchmarks/run_benchmarks.py --output results.json
+python benchmarks/run_benchmarks.py --output results.json --baseline baseline.json
+"""
+import argparse
+import copy
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import lfg_calc_py
+from lfg_calc_py import LFG, common, lfg_log, settings
+from lfg_calc_py.lfg_log import log
+
+BASE_METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+LIFESPANS = [10, 50, 100, 250, 500]
+MATERIAL_COUNTS = [1, 5, 20, 40, 60]
+FACILITY_COUNTS = [1, 10, 100, 1000, 5000]
+QUICK = {'lifespans': [10, 100], 'material_counts': [1, 20],
+         'facility_counts': [1, 100]}
+
+
+def synthetic_config(lifespan=100, n_materials=2, seed=0):
+    """
+    Return a method config based on the example method yaml, with a waste
+    acceptance history over the lifespan and n_materials materials
+    :param lifespan: int, landfill_lifespan
+    :param n_materials: int, number of entries in material_ratios
+    :param seed: int, seed for the waste acceptance rates
+    :return: dict
+    """
+    rng = np.random.default_rng(seed)
+    config = copy.deepcopy(common.load_yaml_dict(BASE_METHOD))
+    config['landfill_lifespan'] = lifespan
+    years = range(2000, 2000 + max(lifespan // 2, 1))
+    config['waste_acceptance_rate'] = {
+        year: float(rate) for year, rate
+        in zip(years, rng.uniform(5e4, 2e5, len(years)))}
+    # use the Barlaz materials where possible, then synthetic materials
+    # with decay rates defined in the config
+    decay_rates = common.load_decay_rate_lookup(config['default_decay_rates'])
+    barlaz = sorted({m for m, moisture in decay_rates
+                     if moisture == config['moisture_conditions']})
+    materials = (barlaz + [f'Synthetic Material {i}'
+                           for i in range(n_materials)])[:n_materials]
+    config['material_ratios'] = {m: 1 / n_materials for m in materials}
+    config['material_decay_rates'] = {
+        m: decay_rates.get((m, config['moisture_conditions']),
+                           float(rng.uniform(0.01, 0.3)))
+        for m in materials}
+    return config
+
+
+@contextmanager
+def temporary_output_paths():
+    """
+    Write LFG output, metadata and logs to a temporary directory, so the
+    benchmarks do not add to or evict from the local output directory
+    """
+    names = ['paths', 'outputpath', 'lfgoutputpath', 'logoutputpath']
+    previous = {name: getattr(settings, name) for name in names}
+    with tempfile.TemporaryDirectory() as folder:
+        paths = copy.deepcopy(settings.paths)
+        paths.local_path = Path(folder) / 'lfg-calc-py'
+        settings.paths = paths
+        settings.outputpath = paths.local_path
+        settings.lfgoutputpath = paths.local_path / 'LFG'
+        settings.logoutputpath = lfg_log.logoutputpath = (
+            paths.local_path / 'Logs')
+        lfg_log.set_log_file('lfg_calc_py.log')
+        try:
+            yield paths.local_path
+        finally:
+            for name, value in previous.items():
+                setattr(settings, name, value)
+            lfg_log.logoutputpath = settings.logoutputpath
+            lfg_log.set_log_file('lfg_calc_py.log')
+
+
+def measure(func, repeat=3):
+    """
+    Return the best wall time of func over repeat runs and the peak memory
+    allocated by a single run. The best time is compared with the baseline,
+    as it is the least affected by other load on the machine.
+    :return: tuple (seconds, peak_mb)
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1e6
+
+
+def import_time(repeat=3):
+    """
+    Return the best wall time to import lfg_calc_py in a new interpreter
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import lfg_calc_py'],
+                       check=True, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(quick=False, repeat=3):
+    """
+    Run all benchmark cases, writing output to a temporary directory
+    :param quick: bool, run a subset of sizes
+    :param repeat: int, number of timed runs of each case
+    :return: list of dicts with the name, parameters, seconds, and peak_mb
+        of each case
+    """
+    lifespans = QUICK['lifespans'] if quick else LIFESPANS
+    material_counts = QUICK['material_counts'] if quick else MATERIAL_COUNTS
+    facility_counts = QUICK['facility_counts'] if quick else FACILITY_COUNTS
+    results = []
+
+    def record(name, params, func):
+        seconds, peak_mb = measure(func, repeat)
+        results.append({'name': name, 'params': params,
+                        'seconds': seconds, 'peak_mb': peak_mb})
+        print(f'{name:<40} {json.dumps(params):<30} '
+              f'{seconds:>10.4f} s {peak_mb:>10.1f} MB')
+
+    results.append({'name': 'import', 'params': {},
+                    'seconds': import_time(repeat), 'peak_mb': None})
+    print(f'{"import":<40} {"{}":<30} {results[-1]["seconds"]:>10.4f} s')
+
+    record('load_yaml_dict', {'method': BASE_METHOD},
+           lambda: common.load_yaml_dict(BASE_METHOD))
+
+    for lifespan in lifespans:
+        config = synthetic_config(lifespan=lifespan)
+        record('calculate_lfg_emissions', {'lifespan': lifespan},
+               lambda: LFG(config=config).calculate_lfg_emissions())
+        # the reference engine is quadratic in the horizon
+        if lifespan <= 100:
+            record('calculate_lfg_emissions_pandas', {'lifespan': lifespan},
+                   lambda: LFG(config=config).calculate_lfg_emissions(
+                       engine='pandas'))
+
+    for n_materials in material_counts:
+        config = synthetic_config(n_materials=n_materials)
+        record('calculate_lfg_emissions', {'materials': n_materials},
+               lambda: LFG(config=config).calculate_lfg_emissions())
+
+    for n_facilities in facility_counts:
+        configs = {f'facility {i}': synthetic_config(n_materials=3, seed=i)
+                   for i in range(n_facilities)}
+        record('calculate_many', {'facilities': n_facilities},
+               lambda: LFG.calculate_many(configs))
+        # the same facilities one at a time, to track the batch speedup
+        record('calculate_lfg_emissions_loop', {'facilities': n_facilities},
+               lambda: [LFG(config=c).calculate_lfg_emissions()
+                        for c in configs.values()])
+
+    with temporary_output_paths():
+        # load saved output, generating it first
+        lfg_calc_py.getLFGCalculations(BASE_METHOD)
+        record('get_lfg_df', {'method': BASE_METHOD},
+               lambda: lfg_calc_py.getLFGCalculations(BASE_METHOD))
+
+    return results
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Compare results against a baseline, printing the ratio of wall times
+    :param results: list of dicts, from run()
+    :param baseline: list of dicts, results of a previous run
+    :param threshold: float, ratio of wall times above which a case is
+        reported as a regression
+    :return: list of dicts, cases slower than the threshold
+    """
+    def key(r):
+        return r['name'], json.dumps(r['params'], sort_keys=True)
+    previous = {key(r): r for r in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get(key(r))
+        if b is None or not b['seconds']:
+            continue
+        ratio = r['seconds'] / b['seconds']
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f'{r["name"]:<40} {json.dumps(r["params"]):<30} '
+              f'{ratio:>8.2f}x {flag}')
+        if ratio > threshold:
+            regressions.append({**r, 'baseline_seconds': b['seconds'],
+                                'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='json file to write results to')
+    parser.add_argument('--baseline',
+                        help='json results file of a previous run to '
+                             'compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='ratio of wall times reported as a regression')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true',
+                        help='run a subset of sizes')
+    args = parser.parse_args()
+
+    log.setLevel(logging.WARNING)
+    results = run(quick=args.quick, repeat=args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'lfg_calc_py': settings.PKG_VERSION_NUMBER,
+                   'results': results}, f, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 """
 Examples for generating landfill emissions
 """
-from lfg_calc_py import getLFGCalculations
+from lfg_calc_py import getLFGCalculations, calculateLFG
 from lfg_calc_py import LFG
 
 
@@ -12,3 +12,7 @@ df_load = getLFGCalculations(methodname)
 
 # optionally, can generate the method, will replace a local file
 df_generate = LFG.generateLFG(methodname)
+
+# calculate in memory without loading or saving output files, from a method
+# name or a method configuration
+df_memory = calculateLFG(methodname).data
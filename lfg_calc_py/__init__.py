@@ -32,3 +32,16 @@ def getLFGCalculations(
     )
 
     return df
+
+
+def calculateLFG(method, **kwargs) -> LFG:
+    """
+    Calculates lfg_calc_py output in memory, without loading or saving
+    output files unless write=True
+    :param method: str, name of an available method, or dict, a method
+        configuration
+    :param kwargs: keyword arguments passed to LFG.calculateLFG(), e.g.
+        engine, profile, write and write_format
+    :return: LFG, with the emissions data in the data attribute
+    """
+    return LFG.calculateLFG(method, **kwargs)
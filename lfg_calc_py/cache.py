@@ -0,0 +1,202 @@
+"""
+Functions to key saved LFG output by the configuration used to generate it,
+and to limit the size of the LFG output directory
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from lfg_calc_py import settings
+from lfg_calc_py.lfg_log import log
+
+
+def _normalize(obj):
+    """
+    Convert dictionary keys to strings so configs can be serialized with
+    sorted keys, e.g. waste_acceptance_rate keys can be int or str
+    """
+    if isinstance(obj, dict):
+        return {str(k): _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    return obj
+
+
+@lru_cache(maxsize=None)
+def reference_data_hash():
+    """
+    Return a hash of the contents of the reference data csvs, calculated
+    once per process, see common.clear_reference_data()
+    :return: str
+    """
+    h = hashlib.sha256()
+    for file in sorted(settings.datapath.glob('*.csv')):
+        h.update(file.name.encode())
+        h.update(file.read_bytes())
+    return h.hexdigest()
+
+
+def normalize_config(config):
+    """
+    Return a method configuration as it is saved in the output metadata,
+    with string keys and json types, so a saved configuration can be
+    compared with a configuration loaded from the method yaml
+    :param config: dict, method configuration
+    :return: dict
+    """
+    return json.loads(json.dumps(_normalize(config), default=str))
+
+
+def config_hash(config):
+    """
+    Return a hash of a fully resolved method configuration (with the
+    contents of any !include: files) and of the reference data, used to
+    check that saved output was generated from the same inputs
+    :param config: dict, method configuration
+    :return: str
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(normalize_config(config), sort_keys=True).encode())
+    h.update(reference_data_hash().encode())
+    return h.hexdigest()
+
+
+def is_current(file_metadata, paths, config_hash):
+    """
+    Check if the saved output for a dataset was generated from a
+    configuration with the same hash
+    :param file_metadata: FileMeta, metadata of the dataset
+    :param paths: Paths, paths to local data
+    :param config_hash: str, hash from config_hash()
+    :return: bool
+    """
+    return load_tool_meta(file_metadata, paths).get('config_hash') == config_hash
+
+
+def output_file(file_metadata, paths):
+    """
+    Return the path an output is saved to, named as by esupy
+    :param file_metadata: FileMeta, metadata of the dataset
+    :param paths: Paths, paths to local data
+    :return: Path
+    """
+    name = (f'{file_metadata.name_data}_v{file_metadata.tool_version}'
+            f'{"_" + file_metadata.git_hash if file_metadata.git_hash else ""}')
+    return (Path(paths.local_path) / file_metadata.category
+            / f'{name}.{file_metadata.ext}')
+
+
+def metadata_file(file):
+    """
+    Return the metadata file of a saved output. The metadata is keyed by
+    the output format, so outputs of the same dataset saved in different
+    formats each keep their own metadata.
+    :param file: Path, saved output
+    :return: Path
+    """
+    return file.with_name(f'{file.stem}_{file.suffix.lstrip(".")}'
+                          f'_metadata.json')
+
+
+def load_tool_meta(file_metadata, paths):
+    """
+    Return the tool metadata saved with the most recent output for a
+    dataset, see metadata.write_metadata()
+    :param file_metadata: FileMeta, metadata of the dataset
+    :param paths: Paths, paths to local data
+    :return: dict, empty if there is no saved output or metadata
+    """
+    file = find_lfg_output(file_metadata, paths)
+    if file is None:
+        return {}
+    try:
+        with open(metadata_file(file)) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return meta.get('tool_meta') or {}
+
+
+def find_lfg_output(file_metadata, paths):
+    """
+    Return the most recent saved output file for a dataset
+    :param file_metadata: FileMeta, metadata of the dataset
+    :param paths: Paths, paths to local data
+    :return: Path, or None if there is no saved output
+    """
+    folder = Path(paths.local_path) / file_metadata.category
+    files = list(folder.glob(f'{file_metadata.name_data}_v*.{file_metadata.ext}'))
+    if not files:
+        return None
+    return max(files, key=os.path.getmtime)
+
+
+def touch_lfg_output(file_metadata, paths):
+    """
+    Mark the saved output for a dataset as recently used, so it is the last
+    output evicted by evict_lfg_output()
+    :param file_metadata: FileMeta, metadata of the dataset
+    :param paths: Paths, paths to local data
+    """
+    file = find_lfg_output(file_metadata, paths)
+    if file is not None:
+        os.utime(file)
+
+
+def evict_lfg_output(max_files=None, max_bytes=None, folder=None):
+    """
+    Delete the least recently used output files (and their metadata) from
+    the LFG output directory until there are at most max_files outputs
+    using at most max_bytes. Files deleted by another process while
+    evicting are ignored.
+    :param max_files: int, maximum number of output files, defaults to
+        settings.LFG_CACHE_MAX_FILES
+    :param max_bytes: int, maximum size of output files in bytes, defaults
+        to settings.LFG_CACHE_MAX_BYTES
+    :param folder: Path, defaults to settings.lfgoutputpath
+    :return: list of deleted output files
+    """
+    max_files = max_files if max_files is not None else settings.LFG_CACHE_MAX_FILES
+    max_bytes = max_bytes if max_bytes is not None else settings.LFG_CACHE_MAX_BYTES
+    folder = folder or settings.lfgoutputpath
+    if (max_files is None and max_bytes is None) or not folder.exists():
+        return []
+
+    # worker processes of generate_many() can evict at the same time, so
+    # files deleted by another process are skipped rather than an error
+    outputs = []
+    for file in folder.iterdir():
+        if file.name.endswith('_metadata.json') or not file.is_file():
+            continue
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            continue
+        outputs.append((file, stat))
+    # most recently used first
+    outputs.sort(key=lambda output: output[1].st_mtime, reverse=True)
+
+    deleted = []
+    kept_files = 0
+    kept_bytes = 0
+    for file, stat in outputs:
+        metadata = metadata_file(file)
+        try:
+            metadata_size = metadata.stat().st_size
+        except FileNotFoundError:
+            metadata_size = 0
+        size = stat.st_size + metadata_size
+        if ((max_files is not None and kept_files >= max_files)
+                or (max_bytes is not None and kept_bytes + size > max_bytes)):
+            file.unlink(missing_ok=True)
+            metadata.unlink(missing_ok=True)
+            deleted.append(file)
+        else:
+            kept_files += 1
+            kept_bytes += size
+    if deleted:
+        log.info(f'Evicted {len(deleted)} least recently used files from '
+                 f'{folder}')
+    return deleted
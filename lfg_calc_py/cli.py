@@ -0,0 +1,212 @@
+"""
+Command line interface to generate LFG output for many methods, e.g.
+
+lfg-calc run path/to/methods --workers 4 --format parquet
+lfg-calc run sites.csv
+lfg-calc serve --port 8000
+
+"run" accepts a directory of method yamls or a csv manifest. Each row of the
+manifest is a site, with a "method" column naming a method yaml (in
+lfg_calc_py/methods, or a path to a yaml), an optional "name" column naming
+the output (defaults to the method and row number), and columns of
+parameters that replace the method yaml values. Nested parameters are set
+with dotted column names, e.g. "waste_acceptance_rate.2023" or
+"material_ratios.Food Waste". Empty cells are ignored.
+
+Output that is current for the method configuration is skipped unless
+--force is given. A table of the status and time of each method is printed,
+and the exit status is 1 if any method failed, including method yamls that
+can not be parsed.
+"""
+import argparse
+import sys
+from copy import deepcopy
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from lfg_calc_py import cache, common, metadata, settings
+from lfg_calc_py.lfg_calc_py import LFG
+from lfg_calc_py.lfg_log import log
+
+
+# errors of method yamls that can not be loaded, reported as failed methods
+LOAD_ERRORS = (yaml.YAMLError, KeyError, TypeError)
+
+
+def load_directory(folder):
+    """
+    Load the method yamls in a directory. Yamls without waste acceptance,
+    such as parameter files included by methods, are skipped.
+    :param folder: Path, directory of method yamls
+    :return: dict of method configurations keyed by method name, and dict
+        of the errors of yamls that could not be loaded keyed by method name
+    """
+    configs, errors = {}, {}
+    for file in sorted(Path(folder).glob('*.yaml')):
+        try:
+            config = common.load_yaml_dict(file.stem, filepath=str(folder))
+        except LOAD_ERRORS as e:
+            errors[file.stem] = f'Could not load {file.name}: {e!r}'
+            continue
+        if not isinstance(config, dict) or 'waste_acceptance_rate' not in config:
+            log.info(f'Skipping {file.name}, not a method')
+            continue
+        configs[file.stem] = config
+    return configs, errors
+
+
+def set_parameter(config, key, value):
+    """
+    Set a parameter of a method configuration, using a dotted key for
+    nested parameters. Keys replace keys of the configuration that are the
+    same as a string, e.g. "2023" replaces the year 2023 of a method yaml.
+    :raises ValueError: if a parent of a dotted key is not a dictionary
+    """
+    *parents, last = key.split('.')
+    for parent in parents:
+        config = config.setdefault(
+            common.return_matching_key(config, parent), {})
+        if not isinstance(config, dict):
+            raise ValueError(f'{key} can not be set, {parent} is not a '
+                             f'dictionary')
+    config[common.return_matching_key(config, last)] = value
+
+
+def load_manifest(path):
+    """
+    Load the method configurations of the sites in a csv manifest
+    :param path: Path, csv manifest, see module docstring
+    :return: dict of method configurations keyed by output name, and dict
+        of the errors of sites whose method yaml or parameters could not be
+        loaded keyed by output name
+    """
+    manifest = pd.read_csv(path, dtype=str, keep_default_na=False)
+    if 'method' not in manifest.columns:
+        raise KeyError(f'{path} must have a "method" column')
+    configs, errors = {}, {}
+    for n, row in manifest.iterrows():
+        method = Path(row['method'])
+        name = row.get('name') or f'{method.stem}_{n}'
+        if name in configs or name in errors:
+            raise ValueError(f'{name} is in {path} more than once')
+        try:
+            if method.suffix in ['.yaml', '.yml']:
+                config = common.load_yaml_dict(method.stem,
+                                               filepath=str(method.parent))
+            else:
+                config = common.load_yaml_dict(row['method'])
+        except LOAD_ERRORS as e:
+            errors[name] = f'Could not load {row["method"]}: {e!r}'
+            continue
+        config = deepcopy(config)
+        try:
+            for key, value in row.items():
+                if key in ['method', 'name'] or value == '':
+                    continue
+                # parse numbers and booleans as in the method yamls
+                set_parameter(config, key, yaml.safe_load(value))
+        except (yaml.YAMLError, ValueError) as e:
+            errors[name] = f'Could not set {key}: {e}'
+            continue
+        configs[name] = config
+    return configs, errors
+
+
+def run(source, workers=None, write_format=None, force=False):
+    """
+    Generate the methods in a directory or manifest. Methods that could not
+    be loaded are recorded as failed.
+    :param source: str or Path, directory of method yamls or csv manifest
+    :param workers: int, number of worker processes
+    :param write_format: str, one of common.WRITE_FORMATS
+    :param force: bool, if True generate output that is already current
+    :return: df with the status, rows and seconds of each method
+    """
+    source = Path(source)
+    if source.is_dir():
+        configs, errors = load_directory(source)
+    elif source.suffix == '.csv':
+        configs, errors = load_manifest(source)
+    else:
+        raise ValueError(f'{source} is not a directory or csv manifest')
+
+    skipped = []
+    if not force:
+        for name, config in configs.items():
+            meta = metadata.set_meta(name, ext=write_format)
+            if cache.is_current(meta, settings.paths,
+                                cache.config_hash(config)):
+                skipped.append(name)
+    to_generate = {k: v for k, v in configs.items() if k not in skipped}
+    log.info(f'{len(skipped)} of {len(configs)} methods are up to date')
+
+    summary = (LFG.generate_many(to_generate, workers=workers,
+                                 write_format=write_format)
+               if to_generate else pd.DataFrame())
+    summary = pd.concat([
+        summary,
+        pd.DataFrame({'Method': skipped, 'Status': 'skipped', 'Rows': 0,
+                      'Seconds': 0.0, 'Error': None}),
+        pd.DataFrame({'Method': list(errors), 'Status': 'failed', 'Rows': 0,
+                      'Seconds': 0.0, 'Error': list(errors.values())})],
+        ignore_index=True)
+    # methods that could not be loaded are listed last
+    order = {name: i for i, name in enumerate([*configs, *errors])}
+    return summary.sort_values('Method', key=lambda s: s.map(order),
+                               ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='lfg-calc',
+        description='Landfill gas generation and emissions calculator')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser(
+        'run', help='generate output for a directory of method yamls or a '
+                    'csv manifest of sites')
+    run_parser.add_argument('source',
+                            help='directory of method yamls or csv manifest')
+    run_parser.add_argument('-w', '--workers', type=int,
+                            help='number of worker processes, defaults to the '
+                                 'number of processors')
+    run_parser.add_argument('-f', '--format', choices=common.WRITE_FORMATS,
+                            default=settings.WRITE_FORMAT,
+                            help='format of the saved output')
+    run_parser.add_argument('--force', action='store_true',
+                            help='generate output that is already up to date')
+    serve_parser = subparsers.add_parser(
+        'serve', help='serve calculations over HTTP, see '
+                      'lfg_calc_py/service.py')
+    serve_parser.add_argument('--host', default='127.0.0.1',
+                              help='address to listen on')
+    serve_parser.add_argument('-p', '--port', type=int, default=8000,
+                              help='port to listen on')
+    serve_parser.add_argument('-w', '--workers', type=int,
+                              help='number of worker processes, defaults to '
+                                   'the number of processors')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from lfg_calc_py.service import serve
+        serve(args.host, args.port, args.workers)
+        return 0
+
+    try:
+        summary = run(args.source, workers=args.workers,
+                      write_format=args.format, force=args.force)
+    except (KeyError, ValueError, FileNotFoundError, yaml.YAMLError) as e:
+        log.error(e)
+        return 2
+
+    print(summary[['Method', 'Status', 'Rows', 'Seconds']]
+          .to_string(index=False, float_format='{:.2f}'.format))
+    failed = summary[summary['Status'] == 'failed']
+    for method, error in zip(failed['Method'], failed['Error']):
+        print(f'{method} failed: {error}', file=sys.stderr)
+    return 1 if len(failed) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,49 @@
 import logging as log
+from functools import lru_cache
 from os import path
+from pathlib import Path
 import re
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
+import esupy.processed_data_mgmt
 
-from lfg_calc_py.settings import methodpath, datapath
+from lfg_calc_py.settings import methodpath
+import lfg_calc_py.settings
+import lfg_calc_py.cache
 import lfg_calc_py.lfg_yaml
 from lfg_calc_py.lfg_log import log
 
+# supported formats of saved output, "feather" is uncompressed Arrow IPC
+# that is memory-mapped when loaded
+WRITE_FORMATS = ['csv', 'parquet', 'feather']
+
+# layouts of LFG output, set by "output_layout" in the method yaml. Wide
+# output has generation, capture, and emissions columns for each material,
+# long output has a row for each year and material
+OUTPUT_LAYOUTS = ['wide', 'long']
+# types of the quantity columns of long output, set by "output_precision"
+OUTPUT_PRECISIONS = ['float64', 'float32']
+METRICS = ['Methane Generation', 'Methane Capture', 'Methane Emitted']
+# parameters that scale the methane generation potential of the waste
+POTENTIAL_PARAMETERS = ['methane_fraction',
+                        'degradable_organic_carbon',
+                        'degradable_organic_carbon_fraction',
+                        'methane_content']
+# parameters that are fractions between 0 and 1
+FRACTION_PARAMETERS = [*POTENTIAL_PARAMETERS, 'methane_oxidation_fraction']
+
+# reference data csv for each source of default decay rates
+DECAY_RATE_SOURCES = {
+    'Barlaz': 'WARM_Barlaz_Material_Decay_Rates',
+    # 'IPCC': 'IPCC_Waste_specific_k-values',
+}
+
 
 def load_yaml_dict(filename, filepath=None, **kwargs):
     """
-    Load the information in a yaml file
+    Load the information in a yaml file. Files are parsed once per process
+    unless they, or a file they include, are modified.
 
     :return: dictionary containing all information in yaml
     """
@@ -42,24 +75,418 @@ def load_yaml_dict(filename, filepath=None, **kwargs):
     yaml_path = f'{folder}/{filename}.yaml'
 
     try:
-        with open(yaml_path, 'r', encoding='utf-8') as f:
-            config = lfg_calc_py.lfg_yaml.load(f, filepath)
+        config = lfg_calc_py.lfg_yaml.load_file(yaml_path, filepath)
     except FileNotFoundError:
         raise KeyError(f"{filename} not found in {folder}")
 
     return config
 
 
-def load_data_csv(filename):
+@lru_cache(maxsize=None)
+def _read_data_csv(filename):
     """
-    Loads csv data from lfg_calc_py/data
-    :param filename:
-    :return:
+    Reads csv data from the data directory, once per process
+    :param filename: str, name of csv without extension
+    :return: df
     """
-    path = datapath/f'{filename}.csv'
+    path = lfg_calc_py.settings.datapath/f'{filename}.csv'
     with open(path) as file:
         df = pd.read_csv(file, encoding='utf-16')
     # replace Byte Order Mark
     df.columns = df.columns.str.replace('ï»¿', '')
     return df
 
+
+def load_data_csv(filename):
+    """
+    Loads csv data from lfg_calc_py/data. Each csv is read once per process,
+    call clear_reference_data() after changing the data directory.
+    :param filename:
+    :return: df, a copy of the loaded data that is safe to modify
+    """
+    return _read_data_csv(filename).copy()
+
+
+@lru_cache(maxsize=None)
+def load_decay_rate_lookup(source):
+    """
+    Return default material decay rates keyed by (material, moisture
+    conditions)
+    :param source: str, source of default decay rates, key of
+        DECAY_RATE_SOURCES
+    :return: read-only dict of float decay rates
+    """
+    try:
+        filename = DECAY_RATE_SOURCES[source]
+    except KeyError:
+        raise KeyError(f'{source} is not a supported source of default decay '
+                       f'rates, use one of {list(DECAY_RATE_SOURCES)}')
+    df = _read_data_csv(filename)
+    return MappingProxyType(dict(zip(
+        zip(df['Material'], df['Landfill_Moisture_Conditions']),
+        df['Decay_Rate'].astype(float))))
+
+
+@lru_cache(maxsize=None)
+def load_collection_efficiency_lookup():
+    """
+    Return WARM LFG collection efficiencies keyed by (scenario, landfill
+    operation year). Fractional years are truncated to the operation year,
+    keeping the first efficiency listed for the year.
+    :return: read-only dict of float efficiencies
+    """
+    df = _read_data_csv('LFG_collection_scenario_values')
+    lookup = {}
+    for scenario, year, efficiency in zip(df['Scenario'],
+                                          df['Year'].astype(int),
+                                          df['Efficiency'].astype(float)):
+        lookup.setdefault((scenario, year), efficiency)
+    return MappingProxyType(lookup)
+
+
+@lru_cache(maxsize=None)
+def _collection_efficiency_matrix(horizon):
+    """
+    Return the LFG collection efficiency matrix for a number of landfill
+    operation years, see load_collection_efficiency_matrix()
+    """
+    lookup = load_collection_efficiency_lookup()
+    scenarios = [*dict.fromkeys(s for s, _ in lookup), False]
+    matrix = np.zeros((len(scenarios), horizon))
+    for i, scenario in enumerate(scenarios):
+        years = [y for s, y in lookup if s == scenario]
+        if not years:
+            continue
+        # years after the last year in the scenario (final cover) keep the
+        # last efficiency
+        efficiency = 0
+        for year in range(horizon):
+            efficiency = lookup.get((scenario, year), efficiency)
+            matrix[i, year] = efficiency
+    matrix.flags.writeable = False
+    return MappingProxyType({s: i for i, s in enumerate(scenarios)}), matrix
+
+
+def load_collection_efficiency_matrix(horizon=None):
+    """
+    Return WARM LFG collection efficiencies as a (scenario, landfill
+    operation year) matrix, with the efficiency of the last year of each
+    scenario extended to the end of the matrix and a row of zeros for no
+    collection (False). The matrix is calculated once for
+    settings.COLLECTION_EFFICIENCY_HORIZON operation years, and again with
+    a doubled horizon if more years are needed.
+    :param horizon: int, minimum number of operation years
+    :return: tuple of a read-only dict of row index keyed by scenario, and a
+        read-only np.array
+    """
+    size = lfg_calc_py.settings.COLLECTION_EFFICIENCY_HORIZON
+    while horizon is not None and size < horizon:
+        size *= 2
+    return _collection_efficiency_matrix(size)
+
+
+def return_collection_efficiency(scenario, T):
+    """
+    Return the LFG collection efficiency of a scenario for each landfill
+    operation year
+    :param scenario: str, LFG collection scenario, or False for no collection
+    :param T: int, number of operation years
+    :return: read-only np.array of shape (T,)
+    """
+    index, matrix = load_collection_efficiency_matrix(T)
+    if scenario not in index:
+        raise KeyError(f'{scenario} is not a supported LFG collection '
+                       f'scenario, use one of {list(index)}')
+    return matrix[index[scenario], :max(T, 0)]
+
+
+def clear_reference_data():
+    """
+    Clear the reference data loaded from the data directory, so it is
+    reloaded on next use. Call after changing settings.datapath or editing
+    the reference csvs.
+    """
+    _read_data_csv.cache_clear()
+    load_decay_rate_lookup.cache_clear()
+    load_collection_efficiency_lookup.cache_clear()
+    _collection_efficiency_matrix.cache_clear()
+    lfg_calc_py.cache.reference_data_hash.cache_clear()
+
+
+def expand_year_ranges(year_dict):
+    """
+    Expand a dictionary keyed by year, where keys can be single years or
+    ranges of years (e.g. "2000-2010"), to a dictionary with an entry for
+    each year
+    :param year_dict: dict, values keyed by year or year range
+    :return: dict, values keyed by str(year)
+    """
+    year_split = {}
+    for key, value in year_dict.items():
+        # if data is provided as a range, split the range and add value for each year to new dictionary
+        if "-" in str(key):
+            y1, y2 = map(int, key.split("-"))
+            for year in range(y1, y2 + 1):
+                year_split[str(year)] = value
+        # else if entry is a single value, append to new dictionary as-is
+        else:
+            year_split[str(key)] = value
+    return year_split
+
+
+def waste_acceptance_years(waste_acceptance_rate):
+    """
+    Return the years and quantities of waste acceptance, with year ranges
+    expanded to one entry per year, in the order listed
+    :param waste_acceptance_rate: dict, waste_acceptance_rate of a method
+        configuration
+    :return: tuple of np.arrays, years (int) and waste acceptance (float)
+    """
+    by_year = expand_year_ranges(waste_acceptance_rate)
+    years = np.fromiter(map(int, by_year), dtype=int, count=len(by_year))
+    waste = np.fromiter(map(float, by_year.values()), dtype=float,
+                        count=len(by_year))
+    return years, waste
+
+
+def return_matching_key(d, key):
+    """
+    Return the key of a dictionary that is the same as a key as a string,
+    e.g. the year 2023 of a method yaml for "2023" from a json or csv
+    value, so the value replaces the existing entry rather than adding a
+    second entry for the same year
+    :param d: dict
+    :param key: key to match
+    :return: the matching key of d, or key if there is none
+    """
+    if key in d:
+        return key
+    return next((k for k in d if str(k) == str(key)), key)
+
+
+def is_time_varying(material_ratios):
+    """
+    Return True if material ratios are keyed by year or year range, with a
+    dictionary of material fractions for each, rather than by material
+    """
+    return any(isinstance(v, dict) for v in material_ratios.values())
+
+
+def return_materials(material_ratios):
+    """
+    Return the materials in the material ratios, in the order they are first
+    listed
+    :param material_ratios: dict, material_ratios of a method configuration
+    :return: list of str
+    """
+    if not is_time_varying(material_ratios):
+        return list(material_ratios)
+    return list(dict.fromkeys(m for ratios in material_ratios.values()
+                              for m in ratios))
+
+
+def material_ratio_array(material_ratios, year_init, T):
+    """
+    Return the fraction of each material in the waste accepted in each
+    landfill operation year. Ratios are either a fraction keyed by material,
+    constant for all years, or a dictionary of fractions keyed by year or
+    year range (e.g. "2000-2009"). Each year uses the ratios of the latest
+    listed year at or before it, and years before the first listed year use
+    the first ratios. Materials not listed for a year are 0.
+    :param material_ratios: dict, material_ratios of a method configuration
+    :param year_init: int, first year of waste acceptance
+    :param T: int, number of years in the calculation
+    :return: tuple of the list of materials and a (material, operation year)
+        np.array, a read-only view for constant ratios
+    """
+    materials = return_materials(material_ratios)
+    if not is_time_varying(material_ratios):
+        ratios = np.array([float(material_ratios[m]) for m in materials])
+        return materials, np.broadcast_to(ratios[:, np.newaxis],
+                                          (len(materials), max(T, 0)))
+    by_year = expand_year_ranges(material_ratios)
+    years = np.array([int(y) for y in by_year])
+    order = np.argsort(years, kind='stable')
+    # (listed year, material) fractions
+    listed = np.array([[float(ratios.get(m, 0)) for m in materials]
+                       for ratios in by_year.values()])[order]
+    position = np.searchsorted(years[order],
+                               year_init + np.arange(max(T, 0)),
+                               side='right') - 1
+    return materials, listed[np.maximum(position, 0)].T
+
+
+def write_chunks_to_csv(chunks, path):
+    """
+    Write dfs to a single csv one at a time, so only one df is held in
+    memory. The header is written with the first df.
+    :param chunks: iterable of dfs with the same columns
+    :param path: str or Path, csv to write, replaced if it exists
+    :return: int, number of rows written
+    """
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        for n, df in enumerate(chunks):
+            df.to_csv(file, index=False, header=(n == 0))
+            rows += len(df)
+    return rows
+
+
+def apply_output_schema(df):
+    """
+    Set the column types of LFG output: int32 years, float64 quantities and
+    categorical string columns. int16 years and float32 quantities of long
+    output are kept.
+    :param df: df of LFG output
+    :return: df
+    """
+    dtypes = {}
+    for c in df.columns:
+        if c in ['Year', 'landfillOperationYear']:
+            dtypes[c] = 'int16' if df[c].dtype == 'int16' else 'int32'
+        elif c in ['Unit', 'LFG Collection Scenario', 'Material']:
+            dtypes[c] = 'category'
+        elif pd.api.types.is_numeric_dtype(df[c]):
+            dtypes[c] = 'float32' if df[c].dtype == 'float32' else 'float64'
+    return df.astype(dtypes)
+
+
+def return_output_layout(config):
+    """
+    Return the output layout and precision set in a method configuration
+    :param config: dict, method configuration
+    :return: tuple of str, layout in OUTPUT_LAYOUTS and precision in
+        OUTPUT_PRECISIONS
+    """
+    layout = config.get('output_layout', 'wide')
+    precision = config.get('output_precision', 'float64')
+    if layout not in OUTPUT_LAYOUTS:
+        raise ValueError(f'{layout} is not a supported output_layout, use '
+                         f'one of {OUTPUT_LAYOUTS}')
+    if precision not in OUTPUT_PRECISIONS:
+        raise ValueError(f'{precision} is not a supported output_precision, '
+                         f'use one of {OUTPUT_PRECISIONS}')
+    return layout, precision
+
+
+def long_lfg_emissions(years, operation_years, materials, values, unit,
+                       scenario, precision='float64'):
+    """
+    Return long format LFG output with a row for each year and material,
+    ordered by year then material
+    :param years: np.array, year of each operation year in the output
+    :param operation_years: np.array, operation years in the output
+    :param materials: list of str, material names
+    :param values: dict of np.arrays keyed by metric, shape (material, year)
+    :param unit: str, unit of the quantities
+    :param scenario: str, LFG collection scenario
+    :param precision: str, type of the quantity columns
+    :return: df with int32 Year, int16 landfillOperationYear, and
+        categorical Material, Unit and LFG Collection Scenario columns
+    """
+    M, n = len(materials), len(operation_years)
+    t = np.repeat(np.arange(n), M)
+    df = pd.DataFrame({
+        'Year': np.asarray(years, dtype='int32')[t],
+        'landfillOperationYear': np.asarray(operation_years, dtype='int16')[t],
+        'Material': pd.Categorical.from_codes(np.tile(np.arange(M), n),
+                                              categories=materials),
+        **{metric: np.asarray(values[metric]).T.ravel().astype(precision)
+           for metric in METRICS},
+        'Unit': pd.Categorical.from_codes(np.zeros(n * M, dtype=int),
+                                          categories=[unit]),
+        'LFG Collection Scenario': pd.Categorical.from_codes(
+            np.zeros(n * M, dtype=int), categories=[scenario]),
+    })
+    return df
+
+
+def wide_to_long(df, materials, precision='float64'):
+    """
+    Convert wide LFG output to long format, see long_lfg_emissions()
+    :param df: wide df of LFG output
+    :param materials: list of str, material names
+    :param precision: str, type of the quantity columns
+    :return: df
+    """
+    values = {metric: df[[f'{m} {metric}' for m in materials]].to_numpy().T
+              for metric in METRICS}
+    return long_lfg_emissions(df['Year'].to_numpy(),
+                              df['landfillOperationYear'].to_numpy(),
+                              materials, values,
+                              df['Unit'].iloc[0] if len(df) else None,
+                              df['LFG Collection Scenario'].iloc[0]
+                              if len(df) else None,
+                              precision)
+
+
+def pivot_lfg_emissions(df):
+    """
+    Pivot long format LFG output to the wide layout, with generation,
+    capture, and emissions columns for each material and in total. Output
+    of LFG.calculate_many() is pivoted to a row for each facility and year.
+    :param df: long format df of LFG output
+    :return: wide df with float64 quantities
+    """
+    index = [c for c in ['Facility', 'Year', 'landfillOperationYear']
+             if c in df.columns]
+    materials = (list(df['Material'].cat.categories)
+                 if isinstance(df['Material'].dtype, pd.CategoricalDtype)
+                 else list(dict.fromkeys(df['Material'])))
+    wide = (df.astype({metric: 'float64' for metric in METRICS})
+            .pivot(index=index, columns='Material', values=METRICS))
+    wide.columns = [f'{m} {metric}' for metric, m in wide.columns]
+    wide = wide[[f'{m} {metric}' for m in materials for metric in METRICS
+                 if f'{m} {metric}' in wide.columns]]
+    for metric in METRICS:
+        wide[f'Total {metric}'] = wide.filter(like=metric).sum(axis=1)
+    labels = (df.groupby(index, sort=False, observed=True)
+              [['Unit', 'LFG Collection Scenario']].first())
+    # categorical labels are converted to the type of their categories, e.g.
+    # bool for LFG_collection_scenario False, as in the wide layout
+    labels = labels.apply(
+        lambda s: s.astype(s.cat.categories.dtype
+                           if isinstance(s.dtype, pd.CategoricalDtype)
+                           else object))
+    wide = (wide.join(labels).reset_index()
+            .astype({'Year': 'int64', 'landfillOperationYear': 'int64'}))
+    return wide
+
+
+def write_lfg_output(df, paths, meta):
+    """
+    Save LFG output in the format set by meta.ext. Parquet and feather
+    outputs are saved with the types set by apply_output_schema().
+    :param df: df of LFG output
+    :param paths: Paths, paths to local data
+    :param meta: FileMeta, metadata of the output
+    """
+    if meta.ext not in WRITE_FORMATS:
+        raise ValueError(f'{meta.ext} is not a supported write format, use '
+                         f'one of {WRITE_FORMATS}')
+    if meta.ext != 'csv':
+        df = apply_output_schema(df)
+    if meta.ext == 'feather':
+        file = lfg_calc_py.cache.output_file(meta, paths)
+        esupy.processed_data_mgmt.mkdir_if_missing(file.parent)
+        # uncompressed so the file can be memory-mapped when loaded
+        df.reset_index(drop=True).to_feather(file,
+                                             compression='uncompressed')
+    else:
+        esupy.processed_data_mgmt.write_df_to_file(df, paths, meta)
+
+
+def load_lfg_output(meta, paths):
+    """
+    Load the most recent saved LFG output in the format set by meta.ext
+    :param meta: FileMeta, metadata of the output
+    :param paths: Paths, paths to local data
+    :return: df, or None if there is no saved output
+    """
+    if meta.ext == 'feather':
+        file = lfg_calc_py.cache.find_lfg_output(meta, paths)
+        if file is None:
+            return None
+        import pyarrow.feather
+        return pyarrow.feather.read_table(file, memory_map=True).to_pandas()
+    return esupy.processed_data_mgmt.load_preprocessed_output(meta, paths)
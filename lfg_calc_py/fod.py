@@ -0,0 +1,210 @@
+"""
+Array implementation of the first order decay (FOD) equation used to
+calculate landfill methane generation. Waste inputs are dense arrays
+indexed by landfill operation year, so generation for every operation year
+is calculated in a single pass over the horizon rather than by building a
+table of every (operation year, input year) pair.
+"""
+import numpy as np
+
+# molecular weight ratio of methane to carbon
+CH4_C_RATIO = 16/12
+
+
+def methane_generation_potential(config):
+    """
+    Return the methane generation potential per unit of waste, the product
+    of the degradable carbon and methane parameters in the method yaml
+    :param config: dict, method configuration
+    :return: float, tonnes CH4 per tonne of waste
+    """
+    return (config.get("methane_fraction")
+            * config.get("degradable_organic_carbon")
+            * config.get("degradable_organic_carbon_fraction")
+            * config.get("methane_content")
+            * CH4_C_RATIO)
+
+
+def waste_acceptance_array(years, waste, year_init, T):
+    """
+    Convert annual waste acceptance into a dense array indexed by landfill
+    operation year, with 0 for years without waste acceptance
+    :param years: np.array of int, years of waste acceptance
+    :param waste: np.array of float, waste accepted in each of years
+    :param year_init: int, first year of waste acceptance
+    :param T: int, number of years in the calculation
+    :return: np.array of shape (T,)
+    """
+    array = np.zeros(T)
+    idx = np.asarray(years, dtype=int) - year_init
+    valid = (idx >= 0) & (idx < T)
+    array[idx[valid]] = np.asarray(waste, dtype=float)[valid]
+    return array
+
+
+def methane_generation(waste, k):
+    """
+    Calculate annual methane generation with the first order decay eqn.
+
+    Methane generated in operation year t by the waste deposited in year
+    i < t is waste[i] * (exp(-k(t-i-1)) - exp(-k(t-i))). Summed over all
+    earlier inputs this is (1 - exp(-k)) * R[t], where R is the decaying
+    mass remaining at the start of year t, R[t] = R[t-1] * exp(-k) + waste[t-1].
+    Calculating R recursively keeps the runtime linear in the horizon.
+
+    :param waste: np.array, methane generation potential of the waste
+        deposited each operation year, shape (..., T)
+    :param k: float or np.array, decay rate(s), broadcastable against
+        waste[..., 0]
+    :return: np.array, methane generated each operation year, shape (..., T)
+    """
+    generated, _ = methane_generation_block(waste, k)
+    return generated
+
+
+def methane_generation_block(waste, k, remaining=0):
+    """
+    Calculate methane generation for a block of consecutive operation years,
+    continuing from the decaying mass remaining after the previous block.
+    Calling this for consecutive blocks gives the same result as
+    methane_generation() for the full horizon, with memory bounded by the
+    block length.
+    :param waste: np.array, methane generation potential of the waste
+        deposited each operation year in the block, shape (..., B)
+    :param k: float or np.array, decay rate(s), broadcastable against
+        waste[..., 0]
+    :param remaining: float or np.array, decaying mass remaining after the
+        previous block, 0 for the first block
+    :return: tuple of np.array, methane generated each operation year in the
+        block, shape (..., B), and the mass remaining after the block
+    """
+    waste = np.asarray(waste, dtype=float)
+    decay = np.exp(-np.asarray(k, dtype=float))
+    shape = np.broadcast_shapes(waste.shape[:-1], decay.shape,
+                                np.shape(remaining))
+    remaining = np.broadcast_to(np.asarray(remaining, dtype=float),
+                                shape).copy()
+    generated = np.empty(shape + waste.shape[-1:])
+    for t in range(waste.shape[-1]):
+        generated[..., t] = remaining
+        remaining = remaining * decay + waste[..., t]
+    return (1 - decay)[..., np.newaxis] * generated, remaining
+
+
+def methane_capture_and_emissions(generated, efficiency, oxidation_fraction):
+    """
+    Split methane generation into captured and emitted methane
+    :param generated: np.array, methane generated, shape (..., T)
+    :param efficiency: np.array, LFG collection efficiency by operation
+        year, broadcastable against generated
+    :param oxidation_fraction: float or np.array, fraction of uncaptured
+        methane that is oxidized
+    :return: tuple of np.arrays (captured, emitted)
+    """
+    captured = generated * efficiency
+    emitted = ((generated - captured)
+               * (1 - np.asarray(oxidation_fraction, dtype=float)))
+    return captured, emitted
+
+
+def generation_fraction(k, input_years, start, stop):
+    """
+    Return the fraction of the methane generation potential of waste
+    deposited in each input year that is generated in operation years
+    start to stop - 1. Summed over operation years, the first order decay
+    eqn telescopes to exp(-k(start-i-1)) - exp(-k(stop-i-1)) for waste
+    deposited in year i < start.
+    :param k: float or np.array, decay rate(s), shape (..., 1) to broadcast
+        against input_years
+    :param input_years: np.array of int, operation years the waste was
+        deposited
+    :param start: int, first operation year
+    :param stop: int, operation year after the last operation year
+    :return: np.array, broadcast shape of k and input_years
+    """
+    input_years = np.asarray(input_years)
+    k = np.asarray(k, dtype=float)
+    # waste generates methane from the year after it is deposited
+    lo = np.maximum(start, input_years + 1)
+    fraction = (np.exp(-k * (lo - input_years - 1))
+                - np.exp(-k * (stop - input_years - 1)))
+    return np.where(stop > lo, fraction, 0)
+
+
+def efficiency_segments(efficiency):
+    """
+    Split collection efficiency by operation year into runs of operation
+    years with the same efficiency
+    :param efficiency: np.array, efficiency by operation year, nan for years
+        without an efficiency
+    :return: list of (start, stop, efficiency) tuples
+    """
+    segments = []
+    start = 0
+    for t in range(1, len(efficiency) + 1):
+        if (t == len(efficiency)
+                or not (efficiency[t] == efficiency[start]
+                        or np.isnan(efficiency[t]) and np.isnan(efficiency[start]))):
+            segments.append((start, t, efficiency[start]))
+            start = t
+    return segments
+
+
+def cumulative_generation_capture_and_emissions(
+        potential, k, input_years, efficiency, oxidation_fraction, stop=None):
+    """
+    Calculate the methane generated, captured, and emitted in operation
+    years before stop by the waste deposited in each input year, without
+    calculating each operation year. Collection efficiency is constant
+    after the first years of operation, so the operation years are split
+    into runs with the same efficiency and each run is summed in closed
+    form. Operation years without an efficiency are excluded, consistent
+    with the annual output.
+    :param potential: np.array, methane generation potential of the waste
+        deposited in each input year, shape (..., N)
+    :param k: np.array, decay rate(s), shape (..., 1)
+    :param input_years: np.array of int, operation years the waste was
+        deposited, shape (N,)
+    :param efficiency: np.array, LFG collection efficiency by operation year
+    :param oxidation_fraction: float, fraction of uncaptured methane that is
+        oxidized
+    :param stop: int, operation year after the last operation year
+        included, defaults to len(efficiency)
+    :return: tuple of np.arrays (generated, captured, emitted), shape (..., N)
+    """
+    stop = len(efficiency) if stop is None else min(stop, len(efficiency))
+    potential = np.asarray(potential, dtype=float)
+    generated = np.zeros(potential.shape)
+    captured = np.zeros(potential.shape)
+    for a, b, e in efficiency_segments(np.asarray(efficiency)[:stop]):
+        if np.isnan(e):
+            continue
+        segment = potential * generation_fraction(k, input_years, a, b)
+        generated += segment
+        captured += segment * e
+    emitted = (generated - captured) * (1 - oxidation_fraction)
+    return generated, captured, emitted
+
+
+def total_generation_capture_and_emissions(
+        waste, potential, decay_rates, efficiency, oxidation_fraction):
+    """
+    Calculate total methane generation, capture, and emissions over all
+    materials for a batch of parameter sets, e.g. Monte Carlo draws
+    :param waste: np.array, waste deposited each operation year times the
+        material fractions, shape (material, T)
+    :param potential: np.array, methane generation potential of each
+        parameter set, shape (n,)
+    :param decay_rates: np.array, material decay rates, shape (n, material)
+    :param efficiency: np.array, LFG collection efficiency by operation
+        year, shape (T,) or (n, T)
+    :param oxidation_fraction: np.array, shape (n,)
+    :return: tuple of np.arrays (generated, captured, emitted), shape (n, T)
+    """
+    # (n, material, year)
+    generated = methane_generation(
+        np.asarray(potential)[:, np.newaxis, np.newaxis] * waste,
+        decay_rates).sum(axis=1)
+    captured, emitted = methane_capture_and_emissions(
+        generated, efficiency, np.asarray(oxidation_fraction)[:, np.newaxis])
+    return generated, captured, emitted
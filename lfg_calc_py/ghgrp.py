@@ -1,49 +1,219 @@
 """
-Download GHGRP tables via StEWI
+Landfill methods from locally stored GHGRP Subpart HH tables
 https://enviro.epa.gov/query-builder/ghg/SUBPART%20HH%20-%20MUNICIPAL%20SOLID%20WASTE%20LANDFILLS/
 
+Tables are csv files named for the table, e.g. as downloaded by StEWI to
+tables/{year}/HH_SUBPART_LEVEL_INFORMATION.csv, or a single file for all
+years. Every file of a table under the folder is read, and the tables are
+combined into one row per facility and reporting year, cached as parquet so
+repeat runs do not read the csvs.
+
+configs = return_facility_configs('path/to/ghgrp/tables')
+LFG.calculate_many(configs)
 """
-# import pandas as pd
-# from stewi.GHGRP import import_or_download_table, OUTPUT_PATH, MetaGHGRP, ghgrp_cols
-#
-# # TODO: check table requirements for landgem
-# tables = ['HH_SUBPART_LEVEL_INFORMATION',
-#           'HH_GAS_COLLECTION_SYSTEM_DETLS',
-#           # 'HH_ACTIVE_AERATION_SYS_DETLS', # Not working
-#           ]
-# # year = '2022'
-#
-# # TODO: import start/end years from yaml?
-# # example function imputs
-# year_start = 1960
-# year_end = 2024
-# GHGRP_ID = "1000216"
-#
-# def return_ghgrp_data(GHGRP_ID, year_start, year_end):
-#
-#     # empty df
-#     ghgrp_data = pd.DataFrame()
-#
-#     for year in range(year_start, year_end):
-#         print(year)
-#         # Each table is saved in the specific GHGRP output path by year
-#         tables_dir = OUTPUT_PATH.joinpath('tables', year)
-#         tables_dir.mkdir(exist_ok=True, parents=True)
-#
-#         df = pd.DataFrame()
-#         for table in tables:
-#             filepath = tables_dir.joinpath(f"{table}.csv")
-#             t = import_or_download_table(filepath, table, year, m=MetaGHGRP())
-#             t['table'] = table
-#             df = pd.concat([df, t], ignore_index=True)
-#             # ^^ number of columns can get quite large as they are often unique
-#             # to each table.
-#
-#             # TODO: Check if indents correct for following lines
-#             # TODO: subset by id number
-#
-#             # append to ghgrp_data pandas dataframe
-#             # TODO: need to append to empty dataframe for function to work
-#
-#
-#     return ghgrp_data
\ No newline at end of file
+import hashlib
+import json
+from copy import deepcopy
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import esupy.processed_data_mgmt
+
+from lfg_calc_py import common, settings
+from lfg_calc_py.lfg_log import log
+
+tables = ['HH_SUBPART_LEVEL_INFORMATION',
+          'HH_GAS_COLLECTION_SYSTEM_DETLS',
+          # 'HH_ACTIVE_AERATION_SYS_DETLS', # Not working
+          ]
+
+# columns read from each table, keyed by the Envirofacts column name (case
+# is ignored), with the name used here. Columns that are not required can
+# be missing from the tables.
+ghgrp_cols = {
+    'HH_SUBPART_LEVEL_INFORMATION': {
+        'FACILITY_ID': 'Facility ID',
+        'REPORTING_YEAR': 'Year',
+        'FACILITY_NAME': 'Facility Name',
+        'STATE': 'State',
+        'ANNUAL_WASTE_DISPOSAL_QUANTITY': 'Waste Disposal',
+    },
+    'HH_GAS_COLLECTION_SYSTEM_DETLS': {
+        'FACILITY_ID': 'Facility ID',
+        'REPORTING_YEAR': 'Year',
+        'ANNUAL_METHANE_RECOVERED': 'Methane Recovered',
+    },
+}
+required_cols = ['Facility ID', 'Year', 'Waste Disposal']
+
+ghgrp_path = settings.outputpath / 'GHGRP'
+TEMPLATE = 'GHGRP_Subpart_HH_Template'
+
+
+def find_table_files(folder, table):
+    """
+    Return the csv files of a table under a folder
+    :param folder: Path, folder of GHGRP tables
+    :param table: str, table name
+    :return: sorted list of Path
+    """
+    return sorted(Path(folder).rglob(f'{table}.csv'))
+
+
+def read_table(files, columns):
+    """
+    Read the columns of a table from each of its files
+    :param files: list of Path
+    :param columns: dict, names of the columns to read keyed by the table
+        column name
+    :return: df with the renamed columns
+    """
+    upper = {k.upper(): v for k, v in columns.items()}
+    dfs = []
+    for file in files:
+        df = pd.read_csv(file, usecols=lambda c: c.strip().upper() in upper,
+                         dtype=str, keep_default_na=False, na_values=[''])
+        dfs.append(df.rename(columns=lambda c: upper[c.strip().upper()]))
+    df = (pd.concat(dfs, ignore_index=True) if dfs
+          else pd.DataFrame(columns=list(columns.values())))
+    return df
+
+
+def _cache_key(folder, columns):
+    """
+    Return a hash of the table files, their sizes and modification times,
+    and the columns read
+    """
+    h = hashlib.sha256(json.dumps(columns, sort_keys=True).encode())
+    for table in tables:
+        for file in find_table_files(folder, table):
+            stat = file.stat()
+            h.update(f'{file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}'
+                     .encode())
+    return h.hexdigest()[:16]
+
+
+def load_subpart_hh(folder, columns=None, use_cache=True):
+    """
+    Combine the Subpart HH tables into one row per facility and reporting
+    year, with the waste disposed and whether the facility reported a gas
+    collection system
+    :param folder: str or Path, folder of GHGRP tables
+    :param columns: dict, optional, replaces ghgrp_cols for tables with
+        other column names
+    :param use_cache: bool, if False, read the tables even if they are
+        cached
+    :return: df sorted by facility and year
+    """
+    columns = columns or ghgrp_cols
+    cache_file = (ghgrp_path /
+                  f'Subpart_HH_{_cache_key(folder, columns)}.parquet')
+    if use_cache and cache_file.exists():
+        log.info(f'Loading Subpart HH tables from {cache_file}')
+        return pd.read_parquet(cache_file)
+
+    table = 'HH_SUBPART_LEVEL_INFORMATION'
+    files = find_table_files(folder, table)
+    if not files:
+        raise FileNotFoundError(f'No {table}.csv files found in {folder}')
+    log.info(f'Reading {len(files)} {table} files from {folder}')
+    df = read_table(files, columns[table])
+    missing = set(required_cols) - set(df.columns)
+    if missing:
+        raise KeyError(f'{table} is missing columns for {sorted(missing)}, '
+                       f'set the column names with columns')
+    df['Year'] = df['Year'].astype(int)
+    df['Waste Disposal'] = pd.to_numeric(df['Waste Disposal'],
+                                         errors='coerce')
+    # facilities can resubmit reports, keep the last row for each year
+    df = df.drop_duplicates(['Facility ID', 'Year'], keep='last')
+
+    table = 'HH_GAS_COLLECTION_SYSTEM_DETLS'
+    files = find_table_files(folder, table)
+    log.info(f'Reading {len(files)} {table} files from {folder}')
+    gas = read_table(files, columns[table])
+    if len(gas):
+        gas['Year'] = gas['Year'].astype(int)
+        gas['Gas Collection'] = True
+        agg = {'Gas Collection': ('Gas Collection', 'any')}
+        if 'Methane Recovered' in gas:
+            gas['Methane Recovered'] = pd.to_numeric(
+                gas['Methane Recovered'], errors='coerce')
+            agg['Methane Recovered'] = ('Methane Recovered', 'sum')
+        # a facility can report several collection systems
+        gas = gas.groupby(['Facility ID', 'Year']).agg(**agg).reset_index()
+        df = df.merge(gas, on=['Facility ID', 'Year'], how='left')
+        df['Gas Collection'] = (df['Gas Collection'].astype('boolean')
+                                .fillna(False).astype(bool))
+    else:
+        df['Gas Collection'] = False
+    df = df.sort_values(['Facility ID', 'Year'], ignore_index=True)
+
+    esupy.processed_data_mgmt.mkdir_if_missing(ghgrp_path)
+    df.to_parquet(cache_file, index=False)
+    log.info(f'Saved {len(df)} facility years to {cache_file}')
+    return df
+
+
+def return_facility_configs(folder, template=TEMPLATE, columns=None,
+                            use_cache=True):
+    """
+    Return a method configuration for each facility in the Subpart HH
+    tables. The reported waste disposal is the waste acceptance rate, and
+    facilities that report a gas collection system in any year use the
+    collection scenario of the template, otherwise there is no collection.
+    Reported details are saved in the "ghgrp" key of each configuration and
+    the state, if reported, in the "state" key, e.g. for grouping with
+    portfolio.aggregate_configs().
+    :param folder: str or Path, folder of GHGRP tables
+    :param template: str, name of the method yaml with the other parameters,
+        or dict, a method configuration
+    :param columns: dict, optional, replaces ghgrp_cols
+    :param use_cache: bool, if False, read the tables even if they are
+        cached
+    :return: dict of method configurations keyed by "GHGRP_{facility id}"
+    """
+    if not isinstance(template, dict):
+        template = common.load_yaml_dict(template)
+    df = load_subpart_hh(folder, columns, use_cache)
+    df = df[df['Waste Disposal'].notna()]
+    if df.empty:
+        log.warning(f'No waste disposal reported in the tables in {folder}')
+        return {}
+
+    # rows of each facility are contiguous after sorting
+    facility = df['Facility ID'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, facility[1:] != facility[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    years = df['Year'].to_numpy()
+    waste = df['Waste Disposal'].to_numpy(dtype=float)
+    collection = df['Gas Collection'].to_numpy()
+    recovered = (df['Methane Recovered'].to_numpy(dtype=float)
+                 if 'Methane Recovered' in df else None)
+    names = df['Facility Name'].to_numpy() if 'Facility Name' in df else None
+    states = df['State'].to_numpy() if 'State' in df else None
+
+    configs = {}
+    for start, end in zip(starts, ends):
+        config = deepcopy(template)
+        config['waste_acceptance_rate'] = dict(zip(
+            years[start:end].tolist(), waste[start:end].tolist()))
+        has_collection = bool(collection[start:end].any())
+        config['LFG_recovery'] = has_collection
+        if not has_collection:
+            config['LFG_collection_scenario'] = False
+        details = {'facility_id': str(facility[start])}
+        if names is not None:
+            details['facility_name'] = names[end - 1]
+        if recovered is not None:
+            details['methane_recovered'] = {
+                int(y): float(r) for y, r in zip(years[start:end],
+                                                 recovered[start:end])
+                if not np.isnan(r)}
+        config['ghgrp'] = details
+        if states is not None and isinstance(states[end - 1], str):
+            config['state'] = states[end - 1]
+        configs[f'GHGRP_{facility[start]}'] = config
+    log.info(f'Created method configurations for {len(configs)} facilities')
+    return configs
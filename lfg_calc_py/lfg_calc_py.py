@@ -8,29 +8,32 @@ defined in this file are specific to LFG data.
 # to circular reasoning
 from __future__ import annotations
 
+import os
+import time
 import pandas as pd
 import numpy as np
 from copy import deepcopy
 from functools import partial, reduce
-from sympy import exp, symbols
 
 import esupy.processed_data_mgmt
 
-from lfg_calc_py import settings, common, metadata
-from lfg_calc_py.settings import DEFAULT_DOWNLOAD_IF_MISSING, datapath
-from lfg_calc_py.lfg_log import reset_log_file, log
+from lfg_calc_py import (settings, common, metadata, fod, cache, profiling,
+                         validation)
+from lfg_calc_py.settings import DEFAULT_DOWNLOAD_IF_MISSING
+from lfg_calc_py.lfg_log import reset_log_file, set_log_file, log
 import lfg_calc_py.lfg_yaml as lfg_yaml
-# from lfg_calc_py.validation import check_if_landfill_is_full
 
 # with open(settings.datapath / 'lfg_config.yaml') as f:
 #     lfg_config = lfg_yaml.load(f)
 
 
 class LFG:
-    _metadata = ['full_name', 'config']
+    _metadata = ['full_name', 'config', 'profile', 'fod_state']
 
     full_name: str
     config: dict
+    profile: profiling.Profile
+    fod_state: dict
 
     def __init__(
         self,
@@ -98,8 +101,14 @@ class LFG:
         *,
         full_name: str = None,
         config: dict = None,
-        external_data_path: str = None
+        external_data_path: str = None,
+        config_hash: str = None
     ) -> 'LFG':
+        """
+        Load saved LFG output, generating it if it is not found locally.
+        If config_hash is given, saved output generated from a different
+        configuration is not used and the output is regenerated.
+        """
         paths = deepcopy(settings.paths)
         paths.local_path = external_data_path or paths.local_path
 
@@ -118,14 +127,19 @@ class LFG:
                 )
             if attempt == 'generate':
                 lfg_generator()
-            df = esupy.processed_data_mgmt.load_preprocessed_output(
-                file_metadata,
-                paths
-            )
+            df = common.load_lfg_output(file_metadata, paths)
             if df is None:
                 log.info(f'{file_metadata.name_data} {file_metadata.category} '
                          f'not found in {paths.local_path}')
+            elif (attempt == 'import local' and config_hash is not None
+                  and not cache.is_current(file_metadata, paths, config_hash)):
+                log.info(f'{file_metadata.name_data} {file_metadata.category} '
+                         f'in {paths.local_path} was generated from a '
+                         f'different configuration')
+                df = None
             else:
+                if attempt == 'import local':
+                    cache.touch_lfg_output(file_metadata, paths)
                 log.info(f'Successfully loaded {file_metadata.name_data} from {output_path}')
                 break
         else:
@@ -141,6 +155,8 @@ class LFG:
         config: dict = None,
         # external_config_path: str = None,
         download_df_ok: bool = DEFAULT_DOWNLOAD_IF_MISSING,
+        write_format: str = None,
+        incremental: bool = False,
         **kwargs
     ) -> 'pd.DataFrame':
         """
@@ -153,14 +169,24 @@ class LFG:
         :param config: dict, method dictionary loaded from method yaml
         :param download_df_ok: bool, if True will attempt to load df
             from EPA's remote server rather than generating (if not found locally)
+        :param write_format: str, format of the saved output to load or
+            generate, one of common.WRITE_FORMATS, defaults to
+            settings.WRITE_FORMAT
+        :param incremental: bool, if True and the saved output is out of
+            date, update it incrementally when possible, see
+            calculate_lfg_emissions_incremental()
         :kwargs: keyword arguments - possible kwargs include full_name and config.
         :return: LFG dataframe
         """
-        file_metadata = metadata.set_meta(method)
+        file_metadata = metadata.set_meta(method, ext=write_format)
+        if config is None:
+            config = common.load_yaml_dict(method)
 
         # todo: add option for externally defined method yaml and to download from Data Commons
         lfg_generator = (
-            lambda x=method: cls.generateLFG(x, config=config)
+            lambda x=method: cls.generateLFG(x, write_format=write_format,
+                                             incremental=incremental,
+                                             config=config)
             )
         # lfg_generator = (
         #     lambda x=method, y=external_config_path: z=download_df_ok:
@@ -174,6 +200,7 @@ class LFG:
             output_path=settings.lfgoutputpath,
             full_name=method,
             config=config,
+            config_hash=cache.config_hash(config),
             **kwargs
         )
 
@@ -184,6 +211,9 @@ class LFG:
             cls,
             method: str,
             external_config_path: str = None,
+            write_format: str = None,
+            profile: bool = False,
+            incremental: bool = False,
             **kwargs
     ) -> 'LFG':
         '''
@@ -194,71 +224,344 @@ class LFG:
         :param download_fba_ok: bool, optional. Whether to attempt to download
             source data FlowByActivity files from EPA server rather than
             generating them.
+        :param write_format: str, optional. Format of the saved output, one
+            of common.WRITE_FORMATS, defaults to settings.WRITE_FORMAT
+        :param profile: bool, optional. If True, record the time, rows, and
+            peak memory of each stage of the generation, logged and
+            returned as a profiling.Profile in the profile attribute of the
+            LFG
+        :param incremental: bool, optional. If True, update the saved output
+            for the method when only waste acceptance years were added or
+            calc_year was extended, see calculate_lfg_emissions_incremental()
         :kwargs: keyword arguments to pass to load_yaml_dict(). Possible kwargs
-            include config.
+            include config, a method dictionary used instead of loading the
+            method yaml.
         '''
         log.info('Beginning generation for %s', method)
-        method_config = common.load_yaml_dict(method,
-                                              filepath=external_config_path,
-                                              **kwargs)
+        profiler = profiling.Profile() if profile else None
+        with profiling.span(profiler, 'load method yaml'):
+            if kwargs.get('config') is not None:
+                method_config = kwargs['config']
+            else:
+                method_config = common.load_yaml_dict(
+                    method, filepath=external_config_path, **kwargs)
+        with profiling.span(profiler, 'validate'):
+            validation.check_configs({method: method_config})
         # create instance of LFG
         lfg_instance = LFG(
             full_name=method,
             config=method_config,
+            profile=profiler,
             # external_config_path=external_config_path,
             # download_df_ok=download_sources_ok,
             # external_data_path=external_data_path
         )
 
+        meta = metadata.set_meta(method, 'LFG', ext=write_format)
+
         # generate lfg df
-        lfg = lfg_instance.calculate_lfg_emissions()
+        with profiling.span(profiler, 'calculate emissions') as s:
+            if incremental:
+                lfg = lfg_instance.calculate_lfg_emissions_incremental(meta)
+            else:
+                lfg = lfg_instance.calculate_lfg_emissions()
+            s['Rows'] = len(lfg.data)
 
         # Save df and metadata
         log.info(f'LFG generation complete, saving {method} to file')
-        meta = metadata.set_meta(method, 'LFG')
-        # save the emissions data to csv
-        esupy.processed_data_mgmt.write_df_to_file(lfg.data, settings.paths, meta)
+        lfg.save(meta)
+        if profiler is not None:
+            profiler.log_summary()
         reset_log_file(method, meta)
-        metadata.write_metadata(source_name=method,
-                                config=common.load_yaml_dict(
-                                    method, filepath=external_config_path, **kwargs),
-                                df_meta=meta
-                                )
 
         return lfg
 
+    @classmethod
+    def calculateLFG(
+            cls,
+            method: str | dict,
+            external_config_path: str = None,
+            engine: str = 'numpy',
+            profile: bool = False,
+            write: bool = False,
+            write_format: str = None,
+            **kwargs
+    ) -> 'LFG':
+        """
+        Calculate LFG emissions in memory. Unlike generateLFG(), output and
+        metadata are only saved if write is True, and saved output is never
+        loaded, so embedded and batch callers do not read or write the LFG
+        output directory. Log records are still written to the log file
+        unless it is removed with lfg_log.set_log_file(None).
+        :param method: str, name of method yaml file, or dict, a method
+            configuration
+        :param external_config_path: str, optional, folder of the method yaml
+        :param engine: str, 'numpy' or 'pandas', see calculate_lfg_emissions()
+        :param profile: bool, if True, record the time, rows, and peak memory
+            of each stage in the profile attribute of the LFG
+        :param write: bool, if True, save the output and metadata as
+            generateLFG() does
+        :param write_format: str, format of the saved output, one of
+            common.WRITE_FORMATS, defaults to settings.WRITE_FORMAT
+        :kwargs: keyword arguments to pass to load_yaml_dict()
+        :return: LFG, with the emissions data stored in self.data
+        """
+        if isinstance(method, dict):
+            name, config = 'config', method
+        else:
+            name = method
+            config = common.load_yaml_dict(
+                method, filepath=external_config_path, **kwargs)
+        profiler = profiling.Profile() if profile else None
+        with profiling.span(profiler, 'validate'):
+            validation.check_configs({name: config})
+        lfg = cls(full_name=name, config=config, profile=profiler)
+        with profiling.span(profiler, 'calculate emissions') as s:
+            lfg.calculate_lfg_emissions(engine=engine)
+            s['Rows'] = len(lfg.data)
+        if write:
+            lfg.save(metadata.set_meta(name, 'LFG', ext=write_format))
+        return lfg
+
+    def save(
+            self: 'LFG',
+            meta: esupy.processed_data_mgmt.FileMeta = None
+    ) -> None:
+        """
+        Save the emissions data and metadata to the LFG output directory
+        :param meta: FileMeta, metadata of the output, defaults to the
+            metadata of full_name in settings.WRITE_FORMAT
+        """
+        meta = meta or metadata.set_meta(self.full_name, 'LFG')
+        # save the emissions data in the write format
+        with profiling.span(self.profile, 'write output', len(self.data)):
+            common.write_lfg_output(self.data, settings.paths, meta)
+        with profiling.span(self.profile, 'write metadata'):
+            metadata.write_metadata(source_name=self.full_name,
+                                    config=self.config,
+                                    df_meta=meta,
+                                    fod_state=self.fod_state
+                                    )
+        cache.evict_lfg_output()
+
+    @classmethod
+    def generate_many(
+            cls,
+            methods: list | dict,
+            workers: int = None,
+            **kwargs
+    ) -> pd.DataFrame:
+        """
+        Generate many LFG methods in parallel, running generateLFG() for
+        each method in a pool of worker processes. Each worker writes to its
+        own log file, and a method that fails is recorded in the summary
+        rather than stopping the run. Method configurations are validated
+        before any method is generated, and invalid methods, or method yamls
+        that can not be loaded, are recorded as failed without being sent to
+        a worker.
+        :param methods: list of str, names of method yaml files, or a dict of
+            method configurations keyed by the name of the output
+        :param workers: int, number of worker processes, defaults to the
+            number of processors
+        :kwargs: keyword arguments passed to generateLFG() for each method
+        :return: df with the status of each method
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        # create the shared output directories before the workers start
+        esupy.processed_data_mgmt.mkdir_if_missing(settings.lfgoutputpath)
+        esupy.processed_data_mgmt.mkdir_if_missing(settings.logoutputpath)
+
+        # errors of methods that are not sent to a worker
+        invalid = {}
+        if isinstance(methods, dict):
+            configs = methods
+        else:
+            configs = {}
+            for method in methods:
+                try:
+                    configs[method] = common.load_yaml_dict(
+                        method, filepath=kwargs.get('external_config_path'))
+                except KeyError:
+                    # reported as failed by the worker
+                    pass
+                except Exception as e:
+                    # e.g. the method yaml can not be parsed
+                    invalid[method] = f'Could not load method yaml: {e!r}'
+        problems = validation.validate_configs(configs)
+        invalid.update({
+            method: 'Invalid method configuration: ' + '; '.join(
+                f'{p} {m}' for p, m in zip(df['Parameter'], df['Problem']))
+            for method, df in problems.groupby('Facility', sort=False)})
+
+        log.info(f'Generating {len(methods)} methods')
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_generate_worker) as executor:
+            futures = {}
+            for method in methods:
+                if method in invalid:
+                    continue
+                method_kwargs = ({**kwargs, 'config': methods[method]}
+                                 if isinstance(methods, dict) else kwargs)
+                futures[method] = executor.submit(_generate_method, method,
+                                                  method_kwargs)
+            results = []
+            for method in methods:
+                if method in invalid:
+                    result = {'Method': method, 'Status': 'failed',
+                              'Rows': 0, 'Seconds': 0.0,
+                              'Error': invalid[method]}
+                else:
+                    try:
+                        result = futures[method].result()
+                    except Exception as e:
+                        # the worker process failed, e.g. ran out of memory
+                        result = {'Method': method, 'Status': 'failed',
+                                  'Rows': 0, 'Seconds': np.nan,
+                                  'Error': repr(e)}
+                if result['Status'] == 'failed':
+                    log.error(f'{method} failed: {result["Error"]}')
+                results.append(result)
+
+        summary = pd.DataFrame(
+            results, columns=['Method', 'Status', 'Rows', 'Seconds', 'Error'])
+        log.info(f'{(summary["Status"] == "success").sum()} of '
+                 f'{len(summary)} methods generated successfully')
+        return summary
+
+    @classmethod
+    def calculate_many(
+            cls,
+            configs: dict | list,
+    ) -> pd.DataFrame:
+        """
+        Calculate methane generation, capture, and emissions for many
+        landfills in a single pass. Waste acceptance and collection
+        efficiencies are stacked into (facility, year) arrays and material
+        fractions and decay rates into (facility, material) arrays, so the
+        first order decay eqn is evaluated for all facilities at once.
+        Reference data are loaded once and shared by all facilities. All
+        configurations are validated first, and a ValueError listing every
+        problem is raised before any calculation.
+        :param configs: dict of method configurations keyed by facility, or
+            a list of method configurations, keyed by list position
+        :return: long format df with one row per facility, year, and material
+        """
+        if not isinstance(configs, dict):
+            configs = dict(enumerate(configs))
+        validation.check_configs(configs)
+        facilities = list(configs.keys())
+
+        lfgs = [cls(full_name=str(facility), config=config)
+                for facility, config in configs.items()]
+        F = len(lfgs)
+
+        # waste acceptance of every facility, flattened, with year ranges
+        # expanded
+        years, rates = zip(*(common.waste_acceptance_years(
+            c.get("waste_acceptance_rate")) for c in configs.values()))
+        year_init = np.array([y[0] for y in years], dtype=int)
+        horizons = np.array([lfg.return_calc_year(int(y0)) - y0
+                             for lfg, y0 in zip(lfgs, year_init)], dtype=int)
+        T = int(horizons.max())
+
+        # (facility, year) waste acceptance, filled in a single assignment
+        facility = np.repeat(np.arange(F), [len(y) for y in years])
+        offset = np.concatenate(years) - year_init[facility]
+        valid = (offset >= 0) & (offset < horizons[facility])
+        total_waste = np.zeros((F, T))
+        total_waste[facility[valid], offset[valid]] = np.concatenate(
+            rates)[valid]
+
+        # align materials across facilities
+        material_ratios = [common.material_ratio_array(
+            c.get("material_ratios"), y0, t)
+            for c, y0, t in zip(configs.values(), year_init, horizons)]
+        materials = list(dict.fromkeys(
+            m for names, _ in material_ratios for m in names))
+        material_index = {m: j for j, m in enumerate(materials)}
+        M = len(materials)
+
+        # (facility, material, year) waste acceptance
+        waste = np.zeros((F, M, T))
+        efficiency = np.full((F, T), np.nan)
+        decay_rates = np.zeros((F, M))
+        present = np.zeros((F, M), dtype=bool)
+        for f, (lfg, (names, ratios), t) in enumerate(
+                zip(lfgs, material_ratios, horizons)):
+            cols = [material_index[m] for m in names]
+            waste[f, cols, :t] = ratios
+            efficiency[f, :t] = common.return_collection_efficiency(
+                lfg.config.get('LFG_collection_scenario'), t)
+            decay_rates[f, cols] = [lfg.return_material_decay_rates(m)
+                                    for m in names]
+            present[f, cols] = True
+        waste *= total_waste[:, np.newaxis, :]
+        potential = np.array([fod.methane_generation_potential(c)
+                              for c in configs.values()])
+        oxidation = np.array([c.get("methane_oxidation_fraction")
+                              for c in configs.values()], dtype=float)
+
+        # (facility, material, year)
+        generated = fod.methane_generation(
+            waste * potential[:, np.newaxis, np.newaxis],
+            decay_rates)
+        captured, emitted = fod.methane_capture_and_emissions(
+            generated, efficiency[:, np.newaxis, :],
+            oxidation[:, np.newaxis, np.newaxis])
+
+        # keep materials in each facility's waste and operation years with a
+        # collection efficiency, ordered by facility, year, then material
+        mask = (present[:, np.newaxis, :]
+                & ~np.isnan(efficiency)[:, :, np.newaxis])
+        f, t, m = np.nonzero(mask)
+        df = pd.DataFrame({
+            'Facility': np.array(facilities, dtype=object)[f],
+            'Year': year_init[f] + t,
+            'landfillOperationYear': t,
+            'Material': pd.Categorical.from_codes(m, categories=materials),
+            'Methane Generation': generated[f, m, t],
+            'Methane Capture': captured[f, m, t],
+            'Methane Emitted': emitted[f, m, t],
+            'Unit': np.array([c.get("unit") for c in configs.values()],
+                             dtype=object)[f],
+            'LFG Collection Scenario': np.array(
+                [c.get("LFG_collection_scenario") for c in configs.values()],
+                dtype=object)[f],
+        })
+
+        return df
+
 
     # todo: modify to account for "false"/no default data/all user input data
     def load_default_decay_rates(
             self: 'LFG',
     ):
         source = self.config.get("default_decay_rates")
-        if source == "Barlaz":
-            path = datapath/'WARM_Barlaz_Material_Decay_Rates.csv'
-        # elif source == "IPCC":
-        #     path = datapath/'IPCC_Waste_specific_k-values.csv'
-        with open(path) as file:
-            decay_rates = pd.read_csv(file)
+        decay_rates = common.load_data_csv(common.DECAY_RATE_SOURCES[source])
         return decay_rates
 
 
-    def return_waste_acceptance(
+    def return_waste_acceptance_series(
             self: 'LFG',
             waste_rate_df,
-            year
+            year_init,
+            T
     ):
         """
-        Return the waste acceptance for a year, return 0 value if no waste managed that year
-        :param year:
-        :return:
+        Return waste acceptance indexed by year for each year in the
+        calculation, with 0 for years without waste acceptance
+        :param waste_rate_df: df, from return_waste_rate_df()
+        :param year_init: int, first year of waste acceptance
+        :param T: int, number of years in the calculation
+        :return: pd.Series
         """
-
-        try:
-            return float(waste_rate_df.loc[
-                             waste_rate_df['Year'] == year,
-                             'WasteAcceptanceRate'].values[0])
-        except IndexError:
-            return 0
+        return pd.Series(fod.waste_acceptance_array(
+                             waste_rate_df['Year'],
+                             waste_rate_df['WasteAcceptanceRate'],
+                             year_init, T),
+                         index=pd.RangeIndex(year_init, year_init + T, name='Year'),
+                         name='WasteAcceptanceRate')
 
     def return_material_decay_rates(
             self: 'LFG',
@@ -266,20 +569,33 @@ class LFG:
     ):
         """
         Return the methane generation rate for a material type
+        :param material: str, material name
         :return:
         """
 
         if "material_decay_rates" in self.config:
-            material_decay_rates_df = pd.DataFrame(self.config.get("material_decay_rates").items(),
-                                                   columns=['Material', 'Decay_Rate'])
-        else:
-            material_decay_rates_df = (
-                self.load_default_decay_rates()[
-                    ["Material", "Landfill_Moisture_Conditions", "Decay_Rate"]]
-                .query(f"Landfill_Moisture_Conditions=='{self.config.get('moisture_conditions')}'")
-            )
-        return float(material_decay_rates_df.loc[
-                         material_decay_rates_df['Material'] == material, 'Decay_Rate'].values[0])
+            return float(self.config.get("material_decay_rates")[material])
+        decay_rates = common.load_decay_rate_lookup(
+            self.config.get("default_decay_rates"))
+        return decay_rates[(material, self.config.get('moisture_conditions'))]
+
+    def return_material_ratio_df(
+            self: 'LFG',
+            year_init,
+            T
+    ):
+        """
+        Return the fraction of each material in the waste accepted each
+        year, see common.material_ratio_array()
+        :param year_init: int, first year of waste acceptance
+        :param T: int, number of years in the calculation
+        :return: df indexed by year with a column for each material
+        """
+        materials, ratios = common.material_ratio_array(
+            self.config.get("material_ratios"), year_init, T)
+        return pd.DataFrame(ratios.T, columns=materials,
+                            index=pd.RangeIndex(year_init, year_init + T,
+                                                name='Year'))
 
     def return_material_ratio(
             self: 'LFG',
@@ -287,11 +603,12 @@ class LFG:
             material
     ):
         """
-        Return the fraction of a material in a waste
-        :return:
+        Return the fraction of a material in the waste accepted each year
+        :param material_ratio_df: df, from return_material_ratio_df()
+        :param material: str, material name
+        :return: pd.Series indexed by year
         """
-        return float(material_ratio_df.loc[
-                material_ratio_df['Waste Type'] == material, 'Waste Fraction'].values[0])
+        return material_ratio_df[material]
 
 
     # def return_gas_collection_efficiency(
@@ -310,213 +627,611 @@ class LFG:
     #     except IndexError:
     #         return 0
 
+    def return_waste_rate_df(
+            self: 'LFG',
+    ):
+        """
+        Return the annual waste acceptance rates, with year ranges expanded
+        to one row per year
+        :return: df with 'Year' and 'WasteAcceptanceRate' columns
+        """
+        years, waste = common.waste_acceptance_years(
+            self.config.get("waste_acceptance_rate"))
+        return pd.DataFrame({'Year': years, 'WasteAcceptanceRate': waste})
 
-    def return_annual_lfg_collection_efficiency(
+    def return_calc_year(
             self: 'LFG',
-            annual_lfg_collection_efficiencies,
-            y
+            year_init
     ):
         """
-        Return gas collection efficiency by year; return 0 value if LFG is not captured
-        :param year:
-        :return:
+        Return the year at which the calculation ends
+        :param year_init: int, first year of waste acceptance
+        :return: int
+        """
+        if "calc_year" in self.config:
+            calc_year = self.config.get("calc_year")
+        elif "landfill_close" in self.config:
+            calc_year = self.config.get("landfill_close")
+        # default warm calculation
+        else:
+            calc_year = year_init + self.config.get("landfill_lifespan")
+        return calc_year
+
+    def load_annual_lfg_collection_efficiencies(
+            self: 'LFG',
+            T: int = None
+    ):
+        """
+        Return the WARM LFG collection efficiencies for the collection
+        scenario by landfill operation year, with the efficiency of the last
+        year in the scenario extended to the end of the calculation
+        :param T: int, number of operation years, defaults to the landfill
+            lifespan
+        :return: df with 'Scenario', 'landfillOperationYear' and
+            'Efficiency' columns
         """
-        # try:
-        #     return float(annual_lfg_collection_efficiencies.loc[
-        #                  annual_lfg_collection_efficiencies['Year'] == year, 'Efficiency'].values[0])
-        # except IndexError:
-        #     return 0
+        if T is None:
+            T = self.config.get("landfill_lifespan")
+        scenario = self.config.get('LFG_collection_scenario')
+        return pd.DataFrame({
+            'Scenario': scenario,
+            'landfillOperationYear': range(T),
+            'Efficiency': common.return_collection_efficiency(scenario, T)
+        })
 
-        if y<=15:
-            return float(annual_lfg_collection_efficiencies.loc[
-                             annual_lfg_collection_efficiencies['Year'] == y, 'Efficiency'].values[0])
-        elif y>15:
-            return float(annual_lfg_collection_efficiencies.loc[
-                             annual_lfg_collection_efficiencies['Year'] == 15, 'Efficiency'].values[0])
-        else: return 0
+    def return_fod_inputs(
+            self: 'LFG',
+    ):
+        """
+        Return the arrays used in the first order decay calculation, indexed
+        by landfill operation year
+        :return: dict with the first year of waste acceptance ('year_init'),
+            number of years in the calculation ('T'), waste acceptance by
+            operation year ('waste'), material names ('materials'), material
+            fractions by material and operation year ('ratios'), waste
+            acceptance by material and operation year ('material_waste'),
+            material decay rates ('decay_rates'), and collection efficiency
+            by operation year ('efficiency')
+        """
+        # Variable names and units are derived from USEPA's LandGEM tool.
+        years, waste_rates = common.waste_acceptance_years(
+            self.config.get("waste_acceptance_rate"))
 
+        # define first year of waste acceptance
+        year_init = int(years[0])
+        calc_year = self.return_calc_year(year_init)
+
+        # Defining T as the range of calculation
+        T = calc_year - year_init
+
+        # (material, year) fractions, constant or varying by year
+        material_type_list, ratios = common.material_ratio_array(
+            self.config.get("material_ratios"), year_init, T)
+        waste = fod.waste_acceptance_array(years, waste_rates, year_init, T)
+
+        # read-only view of the precomputed efficiency matrix
+        efficiency = common.return_collection_efficiency(
+            self.config.get('LFG_collection_scenario'), T)
+
+        return {
+            'year_init': year_init,
+            'T': T,
+            'waste': waste,
+            'materials': material_type_list,
+            'ratios': ratios,
+            'material_waste': ratios * waste,
+            'decay_rates': np.array([
+                self.return_material_decay_rates(m)
+                for m in material_type_list]),
+            'efficiency': efficiency,
+        }
 
     def calculate_lfg_emissions(
             self: 'LFG',
+            engine: str = 'numpy'
     ):
-        # Variable names and units are derived from USEPA's LandGEM tool.
+        """
+        Calculate annual methane generation, capture, and emissions for each
+        material in the waste
+        :param engine: str, 'numpy' to calculate each material as dense
+            arrays indexed by landfill operation year, or 'pandas' to use
+            the reference implementation, which builds a df of every
+            operation year and input year pair
+        :return: LFG, with the emissions data stored in self.data
+        """
+        if engine == 'pandas':
+            return self.calculate_lfg_emissions_pandas()
+        elif engine != 'numpy':
+            raise ValueError(f'{engine} is not a valid engine, '
+                             f'use "numpy" or "pandas"')
+
+        with profiling.span(self.profile, 'load inputs'):
+            inputs = self.return_fod_inputs()
+        material_type_list = inputs['materials']
+
+        with profiling.span(self.profile, 'first order decay',
+                            len(material_type_list) * inputs['T']):
+            generated, remaining = fod.methane_generation_block(
+                inputs['material_waste']
+                * fod.methane_generation_potential(self.config),
+                inputs['decay_rates'])
+
+        with profiling.span(self.profile, 'build df') as s:
+            df = self.return_emissions_df(inputs, generated)
+            s['Rows'] = len(df)
 
-        # WARM LFG collection efficiencies by year
-        annual_lfg_collection_efficiencies = common.load_data_csv('LFG_collection_scenario_values')
+        # store emissions data within self
+        self.data = df
+        self.fod_state = {'T': int(inputs['T']),
+                          'remaining': dict(zip(material_type_list,
+                                                remaining.tolist()))}
 
-        # WARM material-specific LFG collection efficiencies
-        material_lfg_collection_efficiencies = common.load_data_csv('WARM_GasCollectionEfficiencies_v1')
+        return self
 
-        # empty dictionary
-        waste_rate_split = {}
-        material_ratio_split = {}
+    def return_emissions_df(
+            self: 'LFG',
+            inputs,
+            generated
+    ):
+        """
+        Return methane generation, capture, and emissions by year for each
+        material and in total. Operation years without a collection
+        efficiency (nan) are dropped.
+        :param inputs: dict, from return_fod_inputs()
+        :param generated: np.array, methane generated by material and
+            operation year, shape (material, T)
+        :return: df with a row for each operation year, or if output_layout
+            is "long" in the method yaml, a row for each operation year and
+            material, see common.long_lfg_emissions()
+        """
+        layout, precision = common.return_output_layout(self.config)
+        material_type_list = inputs['materials']
+        efficiency = inputs['efficiency']
+        keep = ~np.isnan(efficiency)
+
+        captured, emitted = fod.methane_capture_and_emissions(
+            generated[:, keep], efficiency[keep],
+            self.config.get("methane_oxidation_fraction"))
+        generated = generated[:, keep]
+
+        operation_years = np.arange(inputs['T'])[keep]
+        if layout == 'long':
+            return common.long_lfg_emissions(
+                inputs['year_init'] + operation_years, operation_years,
+                material_type_list,
+                dict(zip(common.METRICS, [generated, captured, emitted])),
+                self.config.get("unit"),
+                self.config.get("LFG_collection_scenario"),
+                precision)
+
+        data = {'Year': inputs['year_init'] + operation_years,
+                'landfillOperationYear': operation_years}
+        for i, material in enumerate(material_type_list):
+            data[f'{material} Methane Generation'] = generated[i]
+            data[f'{material} Methane Capture'] = captured[i]
+            data[f'{material} Methane Emitted'] = emitted[i]
+        # Assign Total Values
+        data['Total Methane Generation'] = generated.sum(axis=0)
+        data['Total Methane Capture'] = captured.sum(axis=0)
+        data['Total Methane Emitted'] = emitted.sum(axis=0)
+
+        df = pd.DataFrame(data)
+        df['Unit'] = self.config.get("unit")
+        df['LFG Collection Scenario'] = self.config.get("LFG_collection_scenario")
+        return df
+
+    def calculate_cumulative_emissions(
+            self: 'LFG',
+            through_year: int = None
+    ):
+        """
+        Calculate cumulative methane generation, capture, and emissions for
+        each material and year of waste acceptance, summed in closed form
+        rather than from the annual output. Totals by material are
+        df.groupby('Material').sum().
+        :param through_year: int, last year included, defaults to the end of
+            the calculation (lifetime totals)
+        :return: long format df with a row for each material and input year
+        """
+        inputs = self.return_fod_inputs()
+        T = inputs['T']
+        stop = T if through_year is None else through_year - inputs['year_init'] + 1
+        input_years = np.flatnonzero(inputs['waste'])
+        materials = inputs['materials']
+
+        generated, captured, emitted = (
+            fod.cumulative_generation_capture_and_emissions(
+                inputs['material_waste'][:, input_years]
+                * fod.methane_generation_potential(self.config),
+                inputs['decay_rates'][:, np.newaxis],
+                input_years,
+                inputs['efficiency'],
+                self.config.get("methane_oxidation_fraction"),
+                stop=max(stop, 0)))
+
+        m, i = np.divmod(np.arange(len(materials) * len(input_years)),
+                         len(input_years))
+        df = pd.DataFrame({
+            'Material': pd.Categorical.from_codes(m, categories=materials),
+            'Input Year': inputs['year_init'] + input_years[i],
+            'Waste Acceptance': inputs['waste'][input_years][i],
+            'Through Year': inputs['year_init'] + min(max(stop, 0), T) - 1,
+            'Methane Generation': generated.ravel(),
+            'Methane Capture': captured.ravel(),
+            'Methane Emitted': emitted.ravel(),
+        })
+        df['Unit'] = self.config.get("unit")
+        df['LFG Collection Scenario'] = self.config.get("LFG_collection_scenario")
+        return df
 
-        for key, value in self.config.get("waste_acceptance_rate").items():
-            # if data is provided as a range, split the range and add waste acceptance for each year to new dictionary
-            if "-" in str(key):
-                y1, y2 = map(int, key.split("-"))
-                for year in range(y1, y2 + 1):
-                    waste_rate_split[str(year)] = value
-            # else if entry is a single value, append to new dictionary as-is
-            else:
-                waste_rate_split[str(key)] = value
-
-        for key, value in self.config.get("material_ratios").items():
-            # if data is provided as a range, split the range and add waste acceptance for each year to new dictionary
-            if "-" in key:
-                y1, y2 = map(int, key.split("-"))
-                for year in range(y1, y2 + 1):
-                    material_ratio_split[str(year)] = value
-            # else if entry is a single value, append to new dictionary as-is
-            else:
-                material_ratio_split[str(key)] = value
+    def return_incremental_start(
+            self: 'LFG',
+            previous_config,
+            fod_state
+    ):
+        """
+        Compare the configuration with the configuration of previously
+        saved output. Output can be updated incrementally if the only
+        changes are added waste acceptance years and a later calc_year.
+        :param previous_config: dict, configuration saved in the output
+            metadata
+        :param fod_state: dict, state saved in the output metadata, see
+            calculate_lfg_emissions()
+        :return: int, first operation year changed by the added waste
+            acceptance, or the end of the previous calculation if no waste
+            was added; None if the output must be fully recalculated
+        """
+        config = cache.normalize_config(self.config)
+        if not fod_state or set(fod_state.get('remaining', {})) != set(
+                common.return_materials(config.get('material_ratios', {}))):
+            return None
+        exempt = ['waste_acceptance_rate', 'calc_year']
+        if ({k: v for k, v in config.items() if k not in exempt}
+                != {k: v for k, v in previous_config.items() if k not in exempt}):
+            return None
+        if ('calc_year' in config) != ('calc_year' in previous_config):
+            return None
+        if config.get('calc_year', 0) < previous_config.get('calc_year', 0):
+            return None
+
+        waste = common.expand_year_ranges(config['waste_acceptance_rate'])
+        previous_waste = common.expand_year_ranges(
+            previous_config['waste_acceptance_rate'])
+        # the first year of waste acceptance sets the operation years
+        if next(iter(waste)) != next(iter(previous_waste)):
+            return None
+        if any(waste.get(year) != value
+               for year, value in previous_waste.items()):
+            return None
+        year_init = int(next(iter(waste)))
+        added = [int(year) - year_init for year in waste
+                 if year not in previous_waste]
+        return min([fod_state['T'], *[a for a in added if a >= 0]])
+
+    def calculate_lfg_emissions_incremental(
+            self: 'LFG',
+            file_metadata: esupy.processed_data_mgmt.FileMeta,
+            paths=None
+    ):
+        """
+        Update saved output for the method, generated with an earlier
+        version of the configuration, rather than recalculating every year.
+        First order decay is linear in the waste, so only the decay of
+        added waste acceptance years and the operation years after the
+        previous calc_year are calculated, continuing from the decaying
+        waste remaining at the end of the previous calculation. Falls back
+        to calculate_lfg_emissions() if there is no saved output or any
+        other parameter changed.
+        :param file_metadata: FileMeta, metadata of the saved output
+        :param paths: Paths, paths to local data, defaults to settings.paths
+        :return: LFG, with the emissions data stored in self.data
+        """
+        paths = paths or settings.paths
+        tool_meta = cache.load_tool_meta(file_metadata, paths)
+        previous_config = tool_meta.get('config')
+        fod_state = tool_meta.get('fod_state')
+        start = None
+        # the reference data must be unchanged
+        if (previous_config is not None and tool_meta.get('config_hash')
+                == cache.config_hash(previous_config)):
+            start = self.return_incremental_start(previous_config, fod_state)
+        previous_df = (common.load_lfg_output(file_metadata, paths)
+                       if start is not None else None)
+        if previous_df is None:
+            log.info(f'Saved output for {file_metadata.name_data} cannot be '
+                     f'updated, recalculating all years')
+            return self.calculate_lfg_emissions()
+        if 'Material' in previous_df.columns:
+            previous_df = common.pivot_lfg_emissions(previous_df)
+
+        inputs = self.return_fod_inputs()
+        materials = inputs['materials']
+        T = inputs['T']
+        T_previous = fod_state['T']
+        log.info(f'Updating {file_metadata.name_data} from operation year '
+                 f'{start}')
+
+        # waste acceptance added since the previous calculation
+        previous_years = common.expand_year_ranges(
+            previous_config['waste_acceptance_rate'])
+        added = inputs['waste'].copy()
+        for year in previous_years:
+            t = int(year) - inputs['year_init']
+            if 0 <= t < T:
+                added[t] = 0
+        potential = fod.methane_generation_potential(self.config)
+
+        # unchanged operation years, nan for years dropped from the output
+        generated = (previous_df
+                     .set_index('landfillOperationYear')
+                     [[f'{m} Methane Generation' for m in materials]]
+                     .reindex(range(T_previous))
+                     .to_numpy(dtype=float).T)
+        # decay of the added waste within the previous calculation
+        added_generated, added_remaining = fod.methane_generation_block(
+            potential * inputs['ratios'][:, start:T_previous]
+            * added[start:T_previous], inputs['decay_rates'])
+        generated[:, start:T_previous] += added_generated
+        # operation years after the previous calculation
+        remaining = (np.array([fod_state['remaining'][m] for m in materials])
+                     + added_remaining)
+        new_generated, remaining = fod.methane_generation_block(
+            potential * inputs['material_waste'][:, T_previous:],
+            inputs['decay_rates'],
+            remaining)
+
+        self.data = self.return_emissions_df(
+            inputs, np.concatenate([generated, new_generated], axis=1))
+        self.fod_state = {'T': int(T),
+                          'remaining': dict(zip(materials, remaining.tolist()))}
+
+        return self
+
+    def iter_lfg_emissions(
+            self: 'LFG',
+            by: str = 'material',
+            block_size: int = 50
+    ):
+        """
+        Calculate methane generation, capture, and emissions in chunks,
+        yielding long format dfs so the full wide df is never held in
+        memory
+        :param by: str, 'material' to yield all years for one material at a
+            time, or 'years' to yield all materials for blocks of
+            block_size years, carrying the decaying waste between blocks
+        :param block_size: int, number of years in each block when by='years'
+        :return: generator of long format dfs with one row per year and
+            material
+        """
+        if by not in ['material', 'years']:
+            raise ValueError(f'{by} is not valid, use "material" or "years"')
+
+        inputs = self.return_fod_inputs()
+        materials = inputs['materials']
+        potential = fod.methane_generation_potential(self.config)
+        oxidation = self.config.get("methane_oxidation_fraction")
+        T = inputs['T']
+        blocks = ([(0, T)] if by == 'material'
+                  else [(a, min(a + block_size, T))
+                        for a in range(0, T, block_size)])
+        groups = ([[j] for j in range(len(materials))] if by == 'material'
+                  else [list(range(len(materials)))])
+
+        for cols in groups:
+            remaining = 0
+            for a, b in blocks:
+                generated, remaining = fod.methane_generation_block(
+                    inputs['material_waste'][cols, a:b] * potential,
+                    inputs['decay_rates'][cols], remaining)
+                efficiency = inputs['efficiency'][a:b]
+                captured, emitted = fod.methane_capture_and_emissions(
+                    generated, efficiency, oxidation)
+
+                # operation years without a collection efficiency are
+                # dropped, consistent with calculate_lfg_emissions()
+                keep = np.flatnonzero(~np.isnan(efficiency))
+                t = np.repeat(keep, len(cols))
+                m = np.tile(np.arange(len(cols)), len(keep))
+                yield pd.DataFrame({
+                    'Year': inputs['year_init'] + a + t,
+                    'landfillOperationYear': a + t,
+                    'Material': np.array(materials, dtype=object)[cols][m],
+                    'Methane Generation': generated[m, t],
+                    'Methane Capture': captured[m, t],
+                    'Methane Emitted': emitted[m, t],
+                    'Unit': self.config.get("unit"),
+                    'LFG Collection Scenario': self.config.get("LFG_collection_scenario"),
+                })
+
+    @classmethod
+    def stream_many(
+            cls,
+            configs: dict | list,
+            path,
+            by: str = 'years',
+            block_size: int = 50
+    ) -> int:
+        """
+        Calculate emissions for many landfills, appending long format
+        results for each landfill to a csv one chunk at a time, so memory is
+        bounded by the chunk size rather than the number of landfills or
+        length of the horizon
+        :param configs: dict of method configurations keyed by facility, or
+            a list of method configurations, keyed by list position
+        :param path: str or Path, csv to write, replaced if it exists
+        :param by: str, see iter_lfg_emissions()
+        :param block_size: int, see iter_lfg_emissions()
+        :return: int, number of rows written
+        """
+        if not isinstance(configs, dict):
+            configs = dict(enumerate(configs))
+
+        def chunks():
+            for facility, config in configs.items():
+                lfg = cls(full_name=str(facility), config=config)
+                for df in lfg.iter_lfg_emissions(by=by, block_size=block_size):
+                    yield df.assign(Facility=facility)[
+                        ['Facility', *df.columns]]
+
+        rows = common.write_chunks_to_csv(chunks(), path)
+        log.info(f'Wrote {rows} rows for {len(configs)} facilities to {path}')
+        return rows
 
-        # convert expanded dictionary into df
-        waste_rate_df = pd.DataFrame(waste_rate_split.items(), columns = ['Year', 'WasteAcceptanceRate'])
-        material_ratio_df = pd.DataFrame(self.config.get("material_ratios").items(),
-                                         columns = ['Waste Type', 'Waste Fraction'])
+    def calculate_lfg_emissions_pandas(
+            self: 'LFG',
+    ):
+        """
+        Reference implementation of calculate_lfg_emissions(), calculates
+        emissions from a df of every landfill operation year and input year
+        pair
+        :return: LFG, with the emissions data stored in self.data
+        """
+        # Variable names and units are derived from USEPA's LandGEM tool.
 
-        # set datatypes
-        waste_rate_df['Year'] = waste_rate_df['Year'].astype(int)
-        waste_rate_df['WasteAcceptanceRate'] = waste_rate_df['WasteAcceptanceRate'].astype(float)
+        waste_rate_df = self.return_waste_rate_df()
 
         # define first year of waste acceptance
         year_init = waste_rate_df['Year'][0]
 
         # Defining calc_year
-        if "calc_year" in self.config:
-            calc_year = self.config.get("calc_year")
-        elif "landfill_close" in self.config:
-            calc_year = self.config.get("landfill_close")
-        # default warm calculation
-        else:
-            calc_year = year_init + self.config.get("landfill_lifespan")
+        calc_year = self.return_calc_year(year_init)
 
         # Defining T as the range of calculation
         T = calc_year - year_init
 
-        # subset waste acceptance rate df to include years up-to and including calc year
-        waste_rate_df_subset = waste_rate_df[waste_rate_df['Year'] <= calc_year-1]
-
-        # add material ratios
-        material_type_list = list(self.config.get("material_ratios").keys())
-
-        # # Remove excess moisture scenarios
-        # material_lfg_collection_efficiencies = (
-        #     material_lfg_collection_efficiencies[
-        #         ["Material", "Proxy", "Scenario", self.config.get("moisture_conditions")]]
-        #     .query(f"Scenario=='{self.config.get('LFG_collection_scenario')}'")
-        # )
-        # Remove excess moisture scenarios
-
-        annual_lfg_collection_efficiencies = (
-            annual_lfg_collection_efficiencies[
-                ["Scenario", "Year", "Efficiency"]]
-            .query(f"Scenario=='{self.config.get('LFG_collection_scenario')}'")
-        )
-        annual_lfg_collection_efficiencies['Year'] = annual_lfg_collection_efficiencies['Year'].astype(int)
-
-        # expand on the lfg collection efficiencies df to add values for years beyond year 15 after disposal
-        if self.config.get('LFG_collection_scenario') is False:
-            efficiency = 0
-        else:
-            efficiency = annual_lfg_collection_efficiencies.loc[annual_lfg_collection_efficiencies['Year'] == 15,
-            'Efficiency'].values[0]
+        # waste acceptance by year up-to and including calc year, 0 for years
+        # without waste acceptance
+        waste_rate_series = self.return_waste_acceptance_series(waste_rate_df, year_init, T)
 
-        added_years = pd.DataFrame({
-            'Scenario': self.config.get('LFG_collection_scenario'),
-            'Year': range(16, self.config.get("landfill_lifespan") + 1),
-            'Efficiency': efficiency
-        })
+        # material ratios by year
+        material_ratio_df = self.return_material_ratio_df(year_init, T)
+        material_type_list = list(material_ratio_df.columns)
 
-        annual_lfg_collection_efficiencies = pd.concat([
-            annual_lfg_collection_efficiencies, added_years], ignore_index=True)
-        annual_lfg_collection_efficiencies = annual_lfg_collection_efficiencies.rename(columns={
-            'Scenario': 'Scenario', 'Year': 'landfillOperationYear', 'Efficiency': 'Efficiency'})
+        with profiling.span(self.profile, 'load collection efficiencies'):
+            annual_lfg_collection_efficiencies = self.load_annual_lfg_collection_efficiencies(T)
 
         # Methane calculation
 
-        # initial df to calc emissions
-        df = pd.DataFrame({
-            'Year': [year_init + i for i in range(T)],
-            'landfillOperationYear': range(T),
-        })
-
-        # add input years then explode
-        df['inputYears'] = df['landfillOperationYear'].apply(lambda x: list(range(x)))
-        df2 = df.explode('inputYears').copy()
-        df2.rename(columns={'inputYears': 'inputYearIndex'}, inplace=True)
-        df2['inputYear'] = df2['inputYearIndex'] + year_init
-        # diff between landfill operation year and year of waste input, used to calc emission gen,
-        # ignore Downcasting object warning
-        with pd.option_context("future.no_silent_downcasting", True):
+        # df to calc emissions with a row for each landfill operation year and
+        # each earlier input year, operation year 0 has one row without an
+        # input year
+        with profiling.span(self.profile, 'explode') as s:
+            operation_years = np.arange(T)
+            counts = np.maximum(operation_years, 1)
+            df2 = pd.DataFrame({
+                'Year': np.repeat(year_init + operation_years, counts),
+                'landfillOperationYear': np.repeat(operation_years, counts),
+            })
+            input_year_index = (np.arange(counts.sum())
+                                - np.repeat(np.cumsum(counts) - counts, counts)).astype(float)
+            input_year_index[df2['landfillOperationYear'].to_numpy() == 0] = np.nan
+            df2['inputYearIndex'] = input_year_index
+            df2['inputYear'] = df2['inputYearIndex'] + year_init
+            # diff between landfill operation year and year of waste input, used to calc emission gen
             df2['yearDiff'] = (df2['landfillOperationYear'] - df2['inputYearIndex']).fillna(0).astype(int)
 
+            # add waste acceptance by input year
+            df2['waste_acceptance'] = df2['inputYear'].map(waste_rate_series).fillna(0)
+            s['Rows'] = len(df2)
+
         # Store all material emission summaries
         emissions_data = []
 
         # loop through materials to calc emissions
         for material in material_type_list:
 
-            # copy parent df
-            df_material = df2.copy()
-
-            # add waste acceptance by input year
-            df_material['waste_acceptance'] = df_material['inputYear'].apply(
-                lambda y: self.return_waste_acceptance(waste_rate_df_subset, y)
-            )
-
-            # Compute methane generated with first order decay eqn
-            df_material['methane_generated'] = (
-                self.return_material_ratio(material_ratio_df, material)
-                * df_material['waste_acceptance']
-                * self.config.get("methane_fraction")
-                * self.config.get("degradable_organic_carbon")
-                * self.config.get("degradable_organic_carbon_fraction")
-                * self.config.get("methane_content")
-                * 16/12
-                * (np.exp(-self.return_material_decay_rates(material) * (df_material['yearDiff'] - 1)
-                          ) - np.exp(-self.return_material_decay_rates(material) * df_material['yearDiff'])
-                   )
-            )
+            with profiling.span(self.profile, 'material',
+                                Material=material) as s:
+                # copy parent df
+                df_material = df2.copy()
+                decay_rate = self.return_material_decay_rates(material)
+
+                # Compute methane generated with first order decay eqn
+                df_material['methane_generated'] = (
+                    df_material['inputYear'].map(self.return_material_ratio(
+                        material_ratio_df, material)).fillna(0)
+                    * df_material['waste_acceptance']
+                    * self.config.get("methane_fraction")
+                    * self.config.get("degradable_organic_carbon")
+                    * self.config.get("degradable_organic_carbon_fraction")
+                    * self.config.get("methane_content")
+                    * 16/12
+                    * (np.exp(-decay_rate * (df_material['yearDiff'] - 1)
+                              ) - np.exp(-decay_rate * df_material['yearDiff'])
+                       )
+                )
 
-            df_material2 = pd.merge(df_material, annual_lfg_collection_efficiencies,
-                                    on='landfillOperationYear', how='inner')
+                df_material2 = pd.merge(df_material, annual_lfg_collection_efficiencies,
+                                        on='landfillOperationYear', how='inner')
 
-            df_material2['methane_captured'] = (
-                    df_material2['methane_generated']
-                    * df_material2['Efficiency']
-            )
+                df_material2['methane_captured'] = (
+                        df_material2['methane_generated']
+                        * df_material2['Efficiency']
+                )
 
-            # Summarize methane metrics by landfill operation year
-            df_agg = df_material2.groupby(['Year', 'landfillOperationYear'])[['methane_generated',
-                                                                                          'methane_captured']].sum().reset_index()
+                # Summarize methane metrics by landfill operation year
+                df_agg = df_material2.groupby(['Year', 'landfillOperationYear'])[['methane_generated',
+                                                                                              'methane_captured']].sum().reset_index()
 
-            df_agg['methane_emitted'] = ((df_agg['methane_generated'] - df_agg['methane_captured'])
-                                         * (1 - self.config.get("methane_oxidation_fraction")))
+                df_agg['methane_emitted'] = ((df_agg['methane_generated'] - df_agg['methane_captured'])
+                                             * (1 - self.config.get("methane_oxidation_fraction")))
 
-            # Rename columns to include material name
-            df_agg.rename(columns={
-                'methane_generated': f'{material} Methane Generation',
-                'methane_captured': f'{material} Methane Capture',
-                'methane_emitted': f'{material} Methane Emitted',
-            }, inplace=True)
+                # Rename columns to include material name
+                df_agg.rename(columns={
+                    'methane_generated': f'{material} Methane Generation',
+                    'methane_captured': f'{material} Methane Capture',
+                    'methane_emitted': f'{material} Methane Emitted',
+                }, inplace=True)
 
-            # Store for final merging
-            emissions_data.append(df_agg)
+                # Store for final merging
+                emissions_data.append(df_agg)
+                s['Rows'] = len(df_material2)
 
         # Merge all material summaries into final result
-        df_merge = reduce(lambda left, right: pd.merge(left, right, on=['Year', 'landfillOperationYear'], how='outer'), emissions_data)
+        with profiling.span(self.profile, 'merge') as s:
+            df_merge = reduce(lambda left, right: pd.merge(left, right, on=['Year', 'landfillOperationYear'], how='outer'), emissions_data)
+            s['Rows'] = len(df_merge)
                 # Assign Total Values
         for c in ['Methane Generation', 'Methane Capture', 'Methane Emitted']:
             df_merge[f'Total {c}'] = df_merge.filter(like=c).sum(axis=1)
         df_merge['Unit'] = self.config.get("unit")
         df_merge['LFG Collection Scenario'] = self.config.get("LFG_collection_scenario")
         df_merge.sort_values(by='Year', inplace=True)
+        layout, precision = common.return_output_layout(self.config)
+        if layout == 'long':
+            df_merge = common.wide_to_long(df_merge, material_type_list,
+                                           precision)
 
-        # todo: add columns for cumulative emissions for each material across years
+        # cumulative emissions for each material are calculated by
+        # calculate_cumulative_emissions()
 
         # store emissions data within self
         self.data = df_merge
 
         return self
+
+
+def _init_generate_worker():
+    """
+    Initialize a worker process used by LFG.generate_many(), logging to a
+    file named for the process
+    """
+    set_log_file(f'lfg_calc_py_{os.getpid()}.log')
+
+
+def _generate_method(method, kwargs):
+    """
+    Generate a method in a worker process used by LFG.generate_many()
+    :param method: str, name of method yaml file
+    :param kwargs: dict, keyword arguments passed to generateLFG()
+    :return: dict, status of the method
+    """
+    start = time.perf_counter()
+    try:
+        lfg = LFG.generateLFG(method, **kwargs)
+    except Exception as e:
+        log.exception(f'Generation failed for {method}')
+        return {'Method': method, 'Status': 'failed', 'Rows': 0,
+                'Seconds': time.perf_counter() - start, 'Error': repr(e)}
+    return {'Method': method, 'Status': 'success', 'Rows': len(lfg.data),
+            'Seconds': time.perf_counter() - start, 'Error': None}
@@ -1,6 +1,7 @@
 import logging
 import shutil
 import sys
+from pathlib import Path
 from esupy.processed_data_mgmt import mkdir_if_missing
 from lfg_calc_py.settings import logoutputpath
 
@@ -35,8 +36,20 @@ except ModuleNotFoundError:
 file_formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(message)s',
                                    datefmt='%Y-%m-%d %H:%M:%S')
 
+class LogFileHandler(logging.FileHandler):
+    """
+    File handler that creates the log directory when the file is opened
+    """
+    def _open(self):
+        mkdir_if_missing(Path(self.baseFilename).parent)
+        return super()._open()
+
+
 def get_log_file_handler(name='lfg_calc_py.log', level=logging.INFO):
-    handler = logging.FileHandler(logoutputpath / name, mode='w', encoding='utf-8')
+    # delay opening the file until the first record is written, so that
+    # importing the package in a worker process does not truncate the log
+    handler = LogFileHandler(logoutputpath / name, mode='w',
+                             encoding='utf-8', delay=True)
     handler.setLevel(level)
     handler.setFormatter(file_formatter)
     return handler
@@ -67,7 +80,12 @@ def reset_log_file(filename, _meta):
     :param fb_meta: metadata for parquet
     """
     # original log file name - all log statements
-    log_file = logoutputpath / "lfg_calc_py.log"
+    log_files = [h.baseFilename for h in log.handlers
+                 if isinstance(h, logging.FileHandler)]
+    if not log_files:
+        # the log file was removed with set_log_file(None)
+        return
+    log_file = Path(log_files[0])
     # generate new log name
     new_log_name = (logoutputpath / f'{filename}_v'
                     f'{_meta.tool_version}'
@@ -76,11 +94,24 @@ def reset_log_file(filename, _meta):
     # create log directory if missing
     mkdir_if_missing(logoutputpath)
     # rename the standard log file name (os.rename throws error if file
-    # already exists)
-    shutil.copy(log_file, new_log_name)
+    # already exists), the file is not created until the first log record
+    if log_file.exists():
+        shutil.copy(log_file, new_log_name)
 
     # Reset log file
-    for h in log.handlers:
+    set_log_file(log_file.name)
+
+
+def set_log_file(name):
+    """
+    Replace the file handler of the log, e.g. so each worker process
+    writes to its own log file
+    :param name: str, name of log file saved to the Logs directory, or None
+        to only log to the console
+    """
+    for h in list(log.handlers):
         if isinstance(h, logging.FileHandler):
             log.removeHandler(h)
-    log.addHandler(get_log_file_handler('lfg_calc_py.log', logging.INFO))
+            h.close()
+    if name is not None:
+        log.addHandler(get_log_file_handler(name, logging.INFO))
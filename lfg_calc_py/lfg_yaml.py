@@ -1,12 +1,21 @@
 from typing import IO, Callable
+from copy import deepcopy
+import os
 import yaml
 import lfg_calc_py.settings
 from os import path
 import csv
 import importlib
 
+# use the libyaml parser when pyyaml was built with it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-class lfgLoader(yaml.SafeLoader):
+# fully resolved yaml files keyed by (path, external path), with the
+# modification times of the file and every file it includes
+_file_cache = {}
+
+
+class lfgLoader(SafeLoader):
     '''
     Custom YAML loader implementing !include: tag to allow inheriting
     arbitrary nodes from other yaml files.
@@ -17,6 +26,8 @@ class lfgLoader(yaml.SafeLoader):
         # self.add_constructor('!external_config', self.external_config)
         self.external_paths_to_search = []
         self.external_path_to_pass = None
+        # modification times of the files included while loading
+        self.dependencies = {}
 
     @staticmethod
     def include(loader: 'lfgLoader', suffix: str, node: yaml.Node) -> dict:
@@ -33,8 +44,9 @@ class lfgLoader(yaml.SafeLoader):
         else:
             raise FileNotFoundError(f'{file} not found')
 
-        with open(file) as f:
-            branch = load(f, loader.external_path_to_pass)
+        branch, dependencies = _load_file(file, loader.external_path_to_pass)
+        branch = deepcopy(branch)
+        loader.dependencies.update(dependencies)
 
         while keys:
             branch = branch[keys.pop(0)]
@@ -78,3 +90,56 @@ def load(stream: IO, external_path: str = None) -> dict:
         return loader.get_single_data()
     finally:
         loader.dispose()
+
+
+def _mtime(file):
+    try:
+        return os.stat(file).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_file(file, external_path=None):
+    '''
+    Load a yaml file, resolving !include: tags, or return it from the cache
+    if neither the file nor any file it includes has been modified
+    :return: tuple of the loaded data, which must not be modified, and the
+        modification times of the file and the files it includes
+    '''
+    file = path.abspath(file)
+    key = (file, external_path)
+    cached = _file_cache.get(key)
+    if cached is not None and all(_mtime(f) == mtime
+                                  for f, mtime in cached[1].items()):
+        return cached
+    mtime = _mtime(file)
+    with open(file, encoding='utf-8') as f:
+        loader = lfgLoader(f)
+        loader.external_path_to_pass = external_path
+        if external_path is not None:
+            loader.external_paths_to_search.append(external_path)
+        try:
+            data = loader.get_single_data()
+        finally:
+            loader.dispose()
+    _file_cache[key] = (data, {file: mtime, **loader.dependencies})
+    return _file_cache[key]
+
+
+def load_file(file: str, external_path: str = None) -> dict:
+    '''
+    Load a yaml file. The fully resolved file is cached by path and the
+    modification times of the file and every file it includes, so files
+    shared by many methods are parsed once per process.
+    :param file: str, path to the yaml file
+    :param external_path: str, optional, path passed to included files
+    :return: a copy of the loaded data that is safe to modify
+    '''
+    return deepcopy(_load_file(file, external_path)[0])
+
+
+def clear_cache() -> None:
+    '''
+    Clear the cache of loaded yaml files
+    '''
+    _file_cache.clear()
@@ -6,27 +6,30 @@ Functions for creating and loading metadata files for
 FlowByActivity (FBA) and FlowBySector (FBS) datasets
 """
 
+import json
 import pandas as pd
-from esupy.processed_data_mgmt import FileMeta, write_metadata_to_file, \
+from esupy.processed_data_mgmt import FileMeta, mkdir_if_missing, \
     read_source_metadata
-from lfg_calc_py.settings import paths, PKG, PKG_VERSION_NUMBER, WRITE_FORMAT, \
-    GIT_HASH, GIT_HASH_LONG
+from lfg_calc_py import settings
+from lfg_calc_py.cache import (config_hash, metadata_file, normalize_config,
+                               output_file)
 
 
-def set_meta(name_data, category="LFG"):
+def set_meta(name_data, category="LFG", ext=None):
     """
     Create meta data for a parquet
     :param name_data: string, name of df
     :param category: string, 'FlowBySector' or 'FlowByActivity'
+    :param ext: string, file format, defaults to WRITE_FORMAT
     :return: object, metadata for parquet
     """
     df_meta = FileMeta()
-    df_meta.tool = PKG
+    df_meta.tool = settings.PKG
     df_meta.category = category
     df_meta.name_data = name_data
-    df_meta.tool_version = PKG_VERSION_NUMBER
-    df_meta.git_hash = GIT_HASH
-    df_meta.ext = WRITE_FORMAT
+    df_meta.tool_version = settings.PKG_VERSION_NUMBER
+    df_meta.git_hash = settings.GIT_HASH
+    df_meta.ext = ext or settings.WRITE_FORMAT
     df_meta.date_created = \
         pd.to_datetime('today').strftime('%Y-%m-%d %H:%M:%S')
     return df_meta
@@ -40,20 +43,35 @@ def write_metadata(source_name, config, df_meta, **kwargs):
     :param df_meta: object, metadata
     :param category: string, 'FlowBySector' or 'FlowByActivity'
     :param kwargs: additional parameters, if running for FBA, define
-        "year" of data
+        "year" of data. fod_state, the decaying waste remaining at the end
+        of the calculation, is saved for incremental recalculation
     :return: object, metadata that includes methodology for FBAs
     """
     # create empty dictionary
     df_dict = {}
     # add url of method at time of commit
     df_dict['method_url'] = \
-        f'https://github.com/USEPA/lfg-calc-py/blob/{GIT_HASH_LONG}/lfg_calc_py/' \
+        f'https://github.com/USEPA/lfg-calc-py/blob/{settings.GIT_HASH_LONG}/lfg_calc_py/' \
         f'methods/{source_name}.yaml'
 
+    # add hash of the resolved configuration and reference data, used to
+    # check saved output is current
+    df_dict['config_hash'] = config_hash(config)
+    # the resolved configuration and the state at the end of the
+    # calculation, used to update the output incrementally
+    df_dict['config'] = normalize_config(config)
+    if kwargs.get('fod_state') is not None:
+        df_dict['fod_state'] = kwargs['fod_state']
+
     # append url to df metadata
     df_meta.tool_meta = df_dict
 
-    write_metadata_to_file(paths, df_meta)
+    # written next to the output and keyed by its format, so saving the
+    # dataset in another format does not replace this metadata
+    file = metadata_file(output_file(df_meta, settings.paths))
+    mkdir_if_missing(file.parent)
+    with open(file, 'w') as f:
+        json.dump(vars(df_meta), f, indent=4, default=str)
 
     return df_dict
 
@@ -0,0 +1,209 @@
+"""
+Aggregation of the results of many landfills, e.g. for national or
+corporate inventories, by group (such as state or owner), year, and
+material. Facility results are added one at a time into (group, year,
+material) arrays, so saved output is read in a single pass and never
+concatenated.
+
+portfolio = aggregate_saved_output(names, groups={'site_a': 'NC', ...})
+portfolio = aggregate_configs(configs, groups='state')
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from lfg_calc_py import common, metadata, settings
+from lfg_calc_py.lfg_calc_py import LFG
+from lfg_calc_py.lfg_log import log
+
+METRICS = common.METRICS
+
+
+class Portfolio:
+    """
+    Totals of methane generation, capture, and emissions by group, year,
+    and material. Years and materials are added to the arrays as they are
+    found, so the range of years does not need to be known in advance.
+    """
+    def __init__(self, years: tuple = None):
+        """
+        :param years: tuple, optional, (first, last) year to preallocate
+        """
+        self.groups = {}
+        self.materials = {}
+        self.units = set()
+        self.facilities = 0
+        self.year_init = years[0] if years else None
+        n_years = years[1] - years[0] + 1 if years else 0
+        # (group, year, material, metric)
+        self.totals = np.zeros((0, n_years, 0, len(METRICS)))
+        self.present = np.zeros((0, n_years, 0), dtype=bool)
+
+    def _index(self, labels, index):
+        """
+        Return the positions of labels in an index, adding new labels
+        """
+        for label in dict.fromkeys(labels):
+            index.setdefault(label, len(index))
+        return np.array([index[label] for label in labels], dtype=int)
+
+    def _resize(self, year_min, year_max):
+        """
+        Grow the arrays to fit the groups, materials, and years, doubling
+        each axis that is too small
+        """
+        if self.year_init is None:
+            self.year_init = year_min
+        shift = max(self.year_init - year_min, 0)
+        shape = self.totals.shape
+        needed = (len(self.groups), year_max - self.year_init + 1 + shift,
+                  len(self.materials))
+        if (shift == 0 and all(n <= s for n, s in zip(needed, shape))):
+            return
+        new_shape = tuple(max(n, 2 * s) if n > s else s
+                          for n, s in zip(needed, shape))
+        new_shape = (new_shape[0], max(new_shape[1], shape[1] + shift),
+                     new_shape[2])
+        totals = np.zeros(new_shape + (len(METRICS),))
+        present = np.zeros(new_shape, dtype=bool)
+        totals[:shape[0], shift:shift + shape[1], :shape[2]] = self.totals
+        present[:shape[0], shift:shift + shape[1], :shape[2]] = self.present
+        self.totals, self.present = totals, present
+        self.year_init -= shift
+
+    def add(self, df: pd.DataFrame, group='All'):
+        """
+        Add the results of a landfill
+        :param df: wide or long format LFG output of one landfill, or long
+            format output of many landfills (LFG.calculate_many())
+        :param group: group label of the landfill, or for long format
+            output, an array of the group label of each row
+        """
+        if len(df) == 0:
+            return
+        if 'Material' in df.columns:
+            years = df['Year'].to_numpy(dtype=int)
+            materials = df['Material'].to_numpy()
+            values = df[METRICS].to_numpy(dtype=float)
+            groups = np.broadcast_to(np.asarray(group, dtype=object),
+                                     (len(df),))
+            g = self._index(list(groups), self.groups)
+            m = self._index(list(materials), self.materials)
+            self._resize(years.min(), years.max())
+            t = years - self.year_init
+            np.add.at(self.totals, (g, t, m), values)
+            self.present[g, t, m] = True
+            self.facilities += (df['Facility'].nunique()
+                                if 'Facility' in df.columns else 1)
+        else:
+            # wide format, materials are parsed from the column names once
+            materials = [c[:-len(' Methane Generation')] for c in df.columns
+                         if c.endswith(' Methane Generation')
+                         and c != 'Total Methane Generation']
+            years = df['Year'].to_numpy(dtype=int)
+            values = np.stack(
+                [df[[f'{m} {metric}' for m in materials]].to_numpy(dtype=float)
+                 for metric in METRICS], axis=-1)
+            g = self._index([group], self.groups)[0]
+            m = self._index(materials, self.materials)
+            self._resize(years.min(), years.max())
+            t = years - self.year_init
+            # years and materials are unique within a landfill
+            self.totals[g, t[:, np.newaxis], m[np.newaxis, :]] += values
+            self.present[g, t[:, np.newaxis], m[np.newaxis, :]] = True
+            self.facilities += 1
+        if 'Unit' in df.columns:
+            self.units.update(pd.unique(df['Unit'].astype(object)))
+
+    def to_frame(self, by_material: bool = True) -> pd.DataFrame:
+        """
+        Return the totals as a long format df
+        :param by_material: bool, if False, sum the materials
+        :return: df with Group, Year, (Material), and metric columns
+        """
+        if len(self.units) > 1:
+            log.warning(f'Results in different units were added: '
+                        f'{sorted(map(str, self.units))}')
+        totals = self.totals[:len(self.groups), :, :len(self.materials)]
+        present = self.present[:len(self.groups), :, :len(self.materials)]
+        groups = np.array(list(self.groups), dtype=object)
+        if not by_material:
+            totals = totals.sum(axis=2)
+            g, t = np.nonzero(present.any(axis=2))
+            df = pd.DataFrame({'Group': groups[g], 'Year': self.year_init + t,
+                               **dict(zip(METRICS, totals[g, t].T))})
+        else:
+            g, t, m = np.nonzero(present)
+            df = pd.DataFrame({
+                'Group': groups[g],
+                'Year': self.year_init + t,
+                'Material': pd.Categorical.from_codes(
+                    m, categories=list(self.materials)),
+                **dict(zip(METRICS, totals[g, t, m].T))})
+        df['Unit'] = next(iter(self.units)) if len(self.units) == 1 else None
+        return df
+
+
+def aggregate_saved_output(
+        names: list,
+        groups: dict = None,
+        write_format: str = None,
+        years: tuple = None
+) -> Portfolio:
+    """
+    Aggregate saved LFG output, reading one output at a time
+    :param names: list of str, names of the saved output, e.g. method names
+    :param groups: dict, group label keyed by name, defaults to one group
+    :param write_format: str, format of the saved output, one of
+        common.WRITE_FORMATS
+    :param years: tuple, optional, (first, last) year to preallocate
+    :return: Portfolio
+    """
+    portfolio = Portfolio(years)
+    missing = []
+    for name in names:
+        df = common.load_lfg_output(metadata.set_meta(name, ext=write_format),
+                                    settings.paths)
+        if df is None:
+            missing.append(name)
+            continue
+        portfolio.add(df, (groups or {}).get(name, 'All'))
+    if missing:
+        log.warning(f'No saved output found for {len(missing)} of '
+                    f'{len(names)} facilities: {missing}')
+    return portfolio
+
+
+def aggregate_configs(
+        configs: dict | list,
+        groups: dict | str | None = None,
+        batch_size: int = 500,
+        years: tuple = None
+) -> Portfolio:
+    """
+    Calculate and aggregate the results of many landfills, calculating
+    batch_size landfills at a time with LFG.calculate_many() so memory is
+    bounded by the batch size
+    :param configs: dict of method configurations keyed by facility, or a
+        list of method configurations
+    :param groups: dict of group label keyed by facility, or str, a key of
+        the method configurations with the group label (e.g. 'state');
+        defaults to one group
+    :param batch_size: int, number of landfills calculated at once
+    :param years: tuple, optional, (first, last) year to preallocate
+    :return: Portfolio
+    """
+    if not isinstance(configs, dict):
+        configs = dict(enumerate(configs))
+    if isinstance(groups, str):
+        groups = {k: c.get(groups, 'All') for k, c in configs.items()}
+    groups = groups or {}
+    portfolio = Portfolio(years)
+    facilities = list(configs)
+    for start in range(0, len(facilities), batch_size):
+        batch = {f: configs[f] for f in facilities[start:start + batch_size]}
+        df = LFG.calculate_many(batch)
+        portfolio.add(df, df['Facility'].map(
+            lambda f: groups.get(f, 'All')).to_numpy(dtype=object))
+    return portfolio
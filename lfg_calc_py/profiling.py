@@ -0,0 +1,128 @@
+"""
+Opt-in timing and memory profiling of the stages of an LFG calculation.
+Stages are wrapped in spans that record the elapsed time, number of rows
+processed, and the peak memory allocated while the stage ran, e.g.
+
+lfg = LFG.generateLFG('Landfill_Example_Single_Year_Acceptance', profile=True)
+lfg.profile.to_frame()
+lfg.profile.summary()
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+from lfg_calc_py.lfg_log import log
+
+
+class Profile:
+    """
+    Records spans around the stages of an LFG calculation. Memory is traced
+    with tracemalloc while a span is open, and the peak is reset at the
+    start of each span, so each stage reports its own peak rather than the
+    peak of the process so far.
+    """
+    def __init__(self):
+        self.spans = []
+        # spans that have not completed, outermost first, with the memory
+        # traced at their start and their peak so far
+        self._open = []
+        self._started_tracing = False
+
+    def _update_peaks(self):
+        """
+        Fold the traced peak since the last reset into every open span, then
+        reset it
+        :return: int, bytes currently traced
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        for record in self._open:
+            record['peak'] = max(record['peak'], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def span(self, stage, rows=None, **attributes):
+        """
+        Time a stage of the calculation. The span is yielded as a dict, so
+        the number of rows can be set once the stage has run, e.g.
+
+        with profile.span('write output') as s:
+            s['Rows'] = len(df)
+
+        :param stage: str, name of the stage
+        :param rows: int, number of rows processed
+        :param attributes: additional fields recorded with the span, e.g.
+            Material
+        """
+        record = {'Stage': stage, **attributes, 'Rows': rows}
+        if not self._open and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        current = self._update_peaks()
+        memory = {'start': current, 'peak': current}
+        self._open.append(memory)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['Seconds'] = time.perf_counter() - start
+            self._update_peaks()
+            self._open.remove(memory)
+            # memory allocated by the stage above what was allocated at
+            # its start
+            record['Peak memory (MB)'] = (
+                (memory['peak'] - memory['start']) / 1024 ** 2)
+            if not self._open and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+            self.spans.append(record)
+            message = ', '.join([stage, *map(str, attributes.values())])
+            message += f': {record["Seconds"]:.3f} s'
+            if record['Rows'] is not None:
+                message += f', {record["Rows"]} rows'
+            message += f', peak memory {record["Peak memory (MB)"]:.1f} MB'
+            log.info(message)
+
+    def to_frame(self):
+        """
+        Return each recorded span as a row of a df, in the order the spans
+        completed
+        """
+        df = pd.DataFrame(self.spans)
+        if 'Rows' in df:
+            df['Rows'] = df['Rows'].astype('Int64')
+        return df
+
+    def summary(self):
+        """
+        Return the spans aggregated by stage, with the number of spans, total
+        rows and seconds, and the largest peak memory of the stage
+        """
+        df = self.to_frame()
+        if df.empty:
+            return df
+        return (df.groupby('Stage', sort=False)
+                .agg(Count=('Seconds', 'size'),
+                     Rows=('Rows', 'sum'),
+                     Seconds=('Seconds', 'sum'),
+                     **{'Peak memory (MB)': ('Peak memory (MB)', 'max')})
+                .reset_index())
+
+    def log_summary(self):
+        """
+        Write the aggregated spans to the log
+        """
+        log.info('Profile summary:\n%s', self.summary().to_string(index=False))
+
+
+def span(profile, stage, rows=None, **attributes):
+    """
+    Return a span of the profile, or a context that does nothing if
+    profiling is off
+    :param profile: Profile or None
+    """
+    if profile is None:
+        return nullcontext({})
+    return profile.span(stage, rows, **attributes)
@@ -0,0 +1,293 @@
+"""
+Sensitivity analysis of landfill methane generation, capture, and emissions
+to the method parameters. Parameter sets are evaluated as batched arrays
+with the first order decay eqn, split across worker processes, rather than
+calling generateLFG() once per parameter set.
+
+Parameter ranges are defined in a dictionary, e.g.
+
+ranges = {
+    'methane_content': [0.4, 0.6],
+    'degradable_organic_carbon_fraction': [0.4, 0.6],
+    'methane_oxidation_fraction': [0, 0.35],
+    'decay_rates': [0.5, 1.5],
+    'LFG_collection_scenario': ['Typical', 'Worst-case', 'Aggressive'],
+}
+
+Decay rates are either a range of multipliers applied to the decay rates of
+all materials, or a dictionary of decay rate ranges keyed by material, each
+analysed as a separate parameter. The collection scenario is a list of
+scenarios, sampled with equal probability.
+
+one_at_a_time() varies each parameter across its range with the others at
+their method yaml values and returns the elasticity of the totals to each
+parameter. sobol() returns first- and total-order Sobol indices estimated
+with the Saltelli design.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lfg_calc_py import common, fod
+from lfg_calc_py.lfg_calc_py import LFG
+from lfg_calc_py.lfg_log import log
+
+
+class _Model:
+    """
+    Inputs of the first order decay eqn for a method, evaluated for arrays
+    of parameter values
+    """
+    def __init__(self, config, ranges):
+        unknown = set(ranges) - {*common.FRACTION_PARAMETERS, 'decay_rates',
+                                 'LFG_collection_scenario'}
+        if unknown:
+            raise KeyError(f'Sensitivity not supported for {sorted(unknown)}')
+        self.config = config
+        inputs = LFG(config=config).return_fod_inputs()
+        self.year_init = inputs['year_init']
+        self.materials = inputs['materials']
+        self.waste = inputs['material_waste']
+        self.decay_rates = inputs['decay_rates']
+        self.keep = ~np.isnan(inputs['efficiency'])
+
+        # parameters as (name, low, high, base) for continuous parameters or
+        # (name, choices) for the collection scenario
+        self.parameters = []
+        for name in common.FRACTION_PARAMETERS:
+            if name in ranges:
+                low, high = ranges[name]
+                self.parameters.append((name, low, high, config.get(name)))
+        decay_rates = ranges.get('decay_rates')
+        if isinstance(decay_rates, dict):
+            missing = set(decay_rates) - set(self.materials)
+            if missing:
+                raise KeyError(f'Decay rate ranges defined for materials not '
+                               f'in material_ratios: {sorted(missing)}')
+            for material, (low, high) in decay_rates.items():
+                self.parameters.append(
+                    (f'decay_rates: {material}', low, high,
+                     self.decay_rates[self.materials.index(material)]))
+        elif decay_rates is not None:
+            low, high = decay_rates
+            self.parameters.append(('decay_rates', low, high, 1))
+
+        self.scenarios = [config.get('LFG_collection_scenario')]
+        if 'LFG_collection_scenario' in ranges:
+            self.scenarios = list(ranges['LFG_collection_scenario'])
+            self.parameters.append(('LFG_collection_scenario',
+                                    self.scenarios))
+        # (scenario, year) collection efficiencies
+        self.efficiency = np.array([
+            inputs['efficiency'] if s == config.get('LFG_collection_scenario')
+            else LFG(config={**config, 'LFG_collection_scenario': s}
+                     ).return_fod_inputs()['efficiency']
+            for s in self.scenarios])
+
+    @property
+    def names(self):
+        return [p[0] for p in self.parameters]
+
+    def base_values(self):
+        """
+        Return the method yaml value of each continuous parameter, and the
+        index of the method yaml scenario
+        """
+        base = {}
+        for p in self.parameters:
+            if len(p) == 4:
+                base[p[0]] = p[3]
+            else:
+                scenario = self.config.get('LFG_collection_scenario')
+                base[p[0]] = p[1].index(scenario) if scenario in p[1] else 0
+        return base
+
+    def from_unit(self, u):
+        """
+        Scale samples on the unit hypercube, shape (n, parameter), to
+        parameter values
+        """
+        values = {}
+        for j, p in enumerate(self.parameters):
+            if len(p) == 4:
+                values[p[0]] = p[1] + u[:, j] * (p[2] - p[1])
+            else:
+                values[p[0]] = np.minimum(
+                    (u[:, j] * len(p[1])).astype(int), len(p[1]) - 1)
+        return values
+
+    def arrays(self, values, n):
+        """
+        Return the arguments of fod.total_generation_capture_and_emissions()
+        for n parameter sets, parameters not in values are at their method
+        yaml values
+        """
+        def value(name):
+            return np.broadcast_to(values.get(name, self.config.get(name)),
+                                   (n,)).astype(float)
+        potential = fod.CH4_C_RATIO * np.prod(
+            [value(p) for p in common.POTENTIAL_PARAMETERS], axis=0)
+        decay_rates = np.tile(self.decay_rates, (n, 1))
+        if 'decay_rates' in values:
+            decay_rates *= value('decay_rates')[:, np.newaxis]
+        for j, material in enumerate(self.materials):
+            if f'decay_rates: {material}' in values:
+                decay_rates[:, j] = values[f'decay_rates: {material}']
+        scenario = np.broadcast_to(
+            values.get('LFG_collection_scenario', 0), (n,)).astype(int)
+        return (self.waste, potential, decay_rates,
+                self.efficiency[scenario],
+                value('methane_oxidation_fraction'))
+
+    def evaluate(self, values, n, workers=None, chunk_size=250):
+        """
+        Return total generation, capture, and emissions for n parameter
+        sets, keyed by metric, shape (n, operation year)
+        """
+        waste, potential, decay_rates, efficiency, oxidation = self.arrays(
+            values, n)
+        chunks = [slice(a, min(a + chunk_size, n))
+                  for a in range(0, n, chunk_size)]
+        args = [(waste, potential[c], decay_rates[c], efficiency[c],
+                 oxidation[c]) for c in chunks]
+        workers = workers or os.cpu_count()
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))
+                                     ) as executor:
+                results = list(executor.map(_evaluate_chunk, args))
+        else:
+            results = [_evaluate_chunk(a) for a in args]
+        return {metric: np.concatenate([r[i] for r in results])[:, self.keep]
+                for i, metric in enumerate(common.METRICS)}
+
+    def years(self):
+        operation_years = np.flatnonzero(self.keep)
+        return {'Year': self.year_init + operation_years,
+                'landfillOperationYear': operation_years}
+
+
+def _evaluate_chunk(args):
+    """
+    Evaluate a chunk of parameter sets, in a worker process
+    """
+    return fod.total_generation_capture_and_emissions(*args)
+
+
+def one_at_a_time(
+        config: dict,
+        ranges: dict,
+        n_points: int = 5,
+        workers: int = None
+) -> tuple:
+    """
+    Vary each parameter across its range with the other parameters at their
+    method yaml values
+    :param config: dict, method configuration
+    :param ranges: dict, parameter ranges, see module docstring
+    :param n_points: int, number of values of each continuous parameter
+    :param workers: int, number of worker processes, defaults to the number
+        of processors
+    :return: tuple of dfs, the totals by year for each parameter value, and
+        the elasticity of the totals to each continuous parameter by year,
+        the relative change in the total over the relative change in the
+        parameter between the ends of its range
+    """
+    model = _Model(config, ranges)
+    log.info(f'Running one-at-a-time sensitivity for {len(model.names)} '
+             f'parameters')
+    base = model.base_values()
+    rows = []
+    values = {name: [] for name in model.names}
+    for p in model.parameters:
+        sweep = (np.linspace(p[1], p[2], n_points) if len(p) == 4
+                 else np.arange(len(p[1])))
+        for v in sweep:
+            rows.append((p[0], p[1][v] if len(p) == 2 else v))
+            for name in model.names:
+                values[name].append(v if name == p[0] else base[name])
+    n = len(rows)
+    totals = model.evaluate({k: np.array(v) for k, v in values.items()}, n,
+                            workers)
+    base_totals = model.evaluate(base, 1, workers=1)
+    years = model.years()
+
+    sweep_dfs = []
+    elasticity_dfs = []
+    for i, (name, value) in enumerate(rows):
+        sweep_dfs.append(pd.DataFrame({
+            'Parameter': name, 'Value': value, **years,
+            **{f'Total {metric}': totals[metric][i]
+               for metric in common.METRICS}}))
+    start = 0
+    for p in model.parameters:
+        points = n_points if len(p) == 4 else len(p[1])
+        if len(p) == 4 and p[2] != p[1] and p[3]:
+            low, high = start, start + points - 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                elasticity_dfs.append(pd.DataFrame({
+                    'Parameter': p[0], **years,
+                    **{f'Total {metric} Elasticity':
+                       ((totals[metric][high] - totals[metric][low])
+                        / base_totals[metric][0])
+                       / ((p[2] - p[1]) / p[3])
+                       for metric in common.METRICS}}))
+        start += points
+    sweep = pd.concat(sweep_dfs, ignore_index=True)
+    elasticity = (pd.concat(elasticity_dfs, ignore_index=True)
+                  if elasticity_dfs else pd.DataFrame())
+    return sweep, elasticity
+
+
+def sobol(
+        config: dict,
+        ranges: dict,
+        n_samples: int = 1024,
+        seed: int = None,
+        workers: int = None
+) -> pd.DataFrame:
+    """
+    Estimate first- and total-order Sobol indices of the totals by year,
+    with the Saltelli design of n_samples * (parameters + 2) evaluations
+    :param config: dict, method configuration
+    :param ranges: dict, parameter ranges, see module docstring
+    :param n_samples: int, number of base samples
+    :param seed: int, seed for the random number generator
+    :param workers: int, number of worker processes, defaults to the number
+        of processors
+    :return: df with a row for each parameter and year, with the first
+        order (S1) and total order (ST) index of each total
+    """
+    model = _Model(config, ranges)
+    d = len(model.parameters)
+    if d == 0:
+        raise ValueError('No parameter ranges defined')
+    log.info(f'Running Sobol sensitivity for {d} parameters with '
+             f'{n_samples * (d + 2)} evaluations')
+    rng = np.random.default_rng(seed)
+    A = rng.random((n_samples, d))
+    B = rng.random((n_samples, d))
+    # A, B, then A with column i from B for each parameter
+    AB = np.repeat(A[np.newaxis], d, axis=0)
+    for i in range(d):
+        AB[i, :, i] = B[:, i]
+    u = np.concatenate([A, B, AB.reshape(-1, d)])
+    totals = model.evaluate(model.from_unit(u), len(u), workers)
+    years = model.years()
+
+    dfs = []
+    for i, name in enumerate(model.names):
+        data = {'Parameter': name, **years}
+        for metric in common.METRICS:
+            y = totals[metric]
+            f_A, f_B = y[:n_samples], y[n_samples:2 * n_samples]
+            f_AB = y[(2 + i) * n_samples:(3 + i) * n_samples]
+            variance = np.var(np.concatenate([f_A, f_B]), axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                data[f'Total {metric} S1'] = (
+                    np.mean(f_B * (f_AB - f_A), axis=0) / variance)
+                data[f'Total {metric} ST'] = (
+                    0.5 * np.mean((f_A - f_AB) ** 2, axis=0) / variance)
+        dfs.append(pd.DataFrame(data))
+    return pd.concat(dfs, ignore_index=True)
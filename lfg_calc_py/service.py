@@ -0,0 +1,289 @@
+"""
+Local HTTP service for interactive what-if calculations, e.g. from a
+dashboard. The service runs in one long-lived process, so the package,
+reference data, and parsed method yamls are loaded once rather than per
+request. Results are calculated in memory in a pool of worker processes and
+returned as json, nothing is written to disk.
+
+lfg-calc serve --port 8000 --workers 4
+
+POST /calculate with a json body
+    {"method": "Landfill_Example_Single_Year_Acceptance",
+     "config": {"LFG_collection_scenario": "Aggressive",
+                "waste_acceptance_rate": {"2023": 150000}}}
+returns {"method": ..., "seconds": ..., "result": {"columns": [...],
+"data": [[...], ...]}}. "config" values replace the method yaml values,
+nested dictionaries are merged. Without "method", "config" must be a complete
+method configuration. "material_ratios" replaces the method yaml ratios
+rather than being merged, and must sum to 1.
+
+GET /stats returns the number of calculations and the p50 and p99 latency
+in milliseconds of recent calculations. GET /health returns {"status": "ok"}.
+"""
+import asyncio
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lfg_calc_py import common, settings
+from lfg_calc_py.lfg_calc_py import LFG
+from lfg_calc_py.lfg_log import log, set_log_file
+
+# number of recent calculations used for the latency percentiles
+LATENCY_WINDOW = 10000
+# largest request body accepted, in bytes
+MAX_BODY_BYTES = 10 * 1024 ** 2
+# parameters replaced whole by an override rather than merged, as merging
+# material fractions would keep materials the override leaves out
+REPLACED_PARAMETERS = ['material_ratios']
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+def check_material_ratios(material_ratios):
+    """
+    Check that material ratios, constant or for each year, sum to 1
+    :param material_ratios: dict, material_ratios of a method configuration
+    :raises ValueError: if the ratios are not a dictionary or do not sum to 1
+    """
+    if not isinstance(material_ratios, dict) or not material_ratios:
+        raise ValueError('material_ratios must be a dictionary of fractions '
+                         'keyed by material')
+    by_year = (material_ratios if common.is_time_varying(material_ratios)
+               else {'': material_ratios})
+    for year, ratios in by_year.items():
+        label = f'material_ratios {year}'.strip()
+        if not isinstance(ratios, dict):
+            raise ValueError(f'{label} must be a dictionary of fractions '
+                             f'keyed by material')
+        try:
+            total = sum(float(v) for v in ratios.values())
+        except (TypeError, ValueError):
+            raise ValueError(f'{label} must be numbers') from None
+        if abs(total - 1) > settings.MATERIAL_RATIO_TOLERANCE:
+            raise ValueError(f'{label} sum to {total:.6g}, not 1')
+
+
+def merge_config(config, overrides):
+    """
+    Return a copy of a method configuration with values replaced by
+    overrides, merging nested dictionaries other than REPLACED_PARAMETERS.
+    Keys of the overrides replace keys that are the same as a string, e.g.
+    "2023" replaces the year 2023.
+    :param config: dict, method configuration
+    :param overrides: dict, values that replace the configuration values
+    :raises ValueError: if overridden material_ratios do not sum to 1
+    """
+    merged = dict(config)
+    for key, value in overrides.items():
+        key = common.return_matching_key(merged, key)
+        if key == 'material_ratios':
+            check_material_ratios(value)
+        if key in REPLACED_PARAMETERS:
+            merged[key] = value
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _warm_reference_data():
+    """
+    Load the reference data used by the calculations, so the first request
+    handled by a process does not read the reference csvs
+    """
+    for source in common.DECAY_RATE_SOURCES:
+        common.load_decay_rate_lookup(source)
+    common.load_collection_efficiency_matrix()
+    return os.getpid()
+
+
+def _init_worker():
+    """
+    Initialize a worker process of the service, logging to the console only
+    so requests do not write to disk. Interrupts are handled by the service
+    process, which shuts down the workers.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_log_file(None)
+    _warm_reference_data()
+
+
+def _calculate(config):
+    """
+    Calculate the emissions of a method configuration, in a worker process
+    :return: str, json of the emissions df in the "split" orientation
+    """
+    lfg = LFG.calculateLFG(config)
+    return lfg.data.to_json(orient='split', index=False)
+
+
+class Service:
+    """
+    asyncio HTTP server passing calculations to a pool of worker processes
+    """
+    def __init__(self, workers: int = None):
+        """
+        :param workers: int, number of worker processes, defaults to the
+            number of processors
+        """
+        self.workers = workers or os.cpu_count()
+        self.executor = None
+        self.latency = deque(maxlen=LATENCY_WINDOW)
+        self.count = 0
+
+    def stats(self):
+        """
+        Return the number of calculations and the p50 and p99 latency of
+        the recent calculations in milliseconds
+        """
+        stats = {'count': self.count, 'p50_ms': None, 'p99_ms': None}
+        if self.latency:
+            p50, p99 = np.percentile(np.array(self.latency) * 1000, [50, 99])
+            stats.update(p50_ms=round(float(p50), 3),
+                         p99_ms=round(float(p99), 3))
+        return stats
+
+    async def calculate(self, body):
+        """
+        Calculate the emissions for a request body
+        :param body: dict, with "method" and/or "config", see module docstring
+        :return: str, json response
+        """
+        start = time.perf_counter()
+        if not isinstance(body, dict):
+            raise ValueError('Request body must be a json object')
+        method = body.get('method')
+        overrides = body.get('config') or {}
+        if not isinstance(overrides, dict):
+            raise ValueError('"config" must be a json object')
+        if method is None and not overrides:
+            raise ValueError('Request must include "method" or "config"')
+        # parsed method yamls are cached by lfg_yaml
+        config = (merge_config(common.load_yaml_dict(method), overrides)
+                  if method is not None else overrides)
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.executor, _calculate, config)
+        seconds = time.perf_counter() - start
+        self.latency.append(seconds)
+        self.count += 1
+        return (f'{{"method": {json.dumps(method)}, '
+                f'"seconds": {seconds:.6f}, "result": {result}}}')
+
+    async def respond(self, request_method, target, body):
+        """
+        Return the status and json response for a request
+        """
+        path = target.split('?', 1)[0]
+        if path == '/health' and request_method == 'GET':
+            return 200, json.dumps({'status': 'ok'})
+        if path == '/stats' and request_method == 'GET':
+            return 200, json.dumps(self.stats())
+        if path == '/calculate' and request_method == 'POST':
+            try:
+                return 200, await self.calculate(json.loads(body or b'{}'))
+            except json.JSONDecodeError as e:
+                return 400, json.dumps({'error': f'Invalid json: {e}'})
+            except KeyError as e:
+                # unknown method yaml, material, or scenario
+                return 404, json.dumps(
+                    {'error': str(e.args[0] if e.args else e)})
+            except ValueError as e:
+                return 400, json.dumps({'error': str(e)})
+            except Exception as e:
+                log.exception('Calculation failed')
+                return 500, json.dumps({'error': repr(e)})
+        if path in ['/health', '/stats', '/calculate']:
+            return 405, json.dumps({'error': f'{request_method} not allowed'})
+        return 404, json.dumps({'error': f'{path} not found'})
+
+    async def handle(self, reader, writer):
+        """
+        Handle the HTTP/1.1 requests of a connection, keeping the connection
+        open between requests unless the client closes it
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                request_method, target, version = (
+                    request_line.decode('latin-1').split())
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, response = 413, json.dumps(
+                        {'error': 'Request body is too large'})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, response = await self.respond(
+                        request_method, target, body)
+                    keep_alive = (headers.get('connection', '').lower()
+                                  != 'close' and version == 'HTTP/1.1')
+                payload = response.encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}'
+                    f'\r\n\r\n'.encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError,
+                ConnectionResetError):
+            # malformed request or client disconnected
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """
+        Start the worker processes and serve requests until cancelled
+        """
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_init_worker)
+        try:
+            _warm_reference_data()
+            # start the workers before the first request
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[
+                loop.run_in_executor(self.executor, _warm_reference_data)
+                for _ in range(self.workers)])
+            server = await asyncio.start_server(self.handle, host, port)
+            log.info(f'Serving LFG calculations on http://{host}:{port} with '
+                     f'{self.workers} workers')
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            log.info(f'Latency of {self.count} calculations: {self.stats()}')
+
+
+def serve(host='127.0.0.1', port=8000, workers=None):
+    """
+    Run the service until interrupted
+    :param host: str, address to listen on
+    :param port: int, port to listen on
+    :param workers: int, number of worker processes, defaults to the number
+        of processors
+    """
+    try:
+        asyncio.run(Service(workers).serve(host, port))
+    except KeyboardInterrupt:
+        pass
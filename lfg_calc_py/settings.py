@@ -6,8 +6,7 @@ import os
 import subprocess
 from importlib.metadata import version
 from pathlib import Path
-from esupy.processed_data_mgmt import Paths, mkdir_if_missing
-from esupy.util import get_git_hash
+from esupy.processed_data_mgmt import Paths
 
 
 DEFAULT_DOWNLOAD_IF_MISSING = False
@@ -23,10 +22,7 @@ outputpath = paths.local_path
 lfgoutputpath = outputpath / 'LFG'
 logoutputpath = outputpath / 'Logs'
 
-# ensure directories exist
-mkdir_if_missing(lfgoutputpath)
-mkdir_if_missing(logoutputpath)
-
+# output directories are created when the first file is written
 
 
 def return_pkg_version():
@@ -71,14 +67,42 @@ def get_memory():
 
 # metadata
 PKG = "lfg-calc-py"
-PKG_VERSION_NUMBER = return_pkg_version()
-GIT_HASH_LONG = os.environ.get('GITHUB_SHA') or get_git_hash('long')
-if GIT_HASH_LONG:
-    GIT_HASH = GIT_HASH_LONG[0:7]
-else:
-    GIT_HASH = None
+
+
+def __getattr__(name):
+    """
+    Resolve PKG_VERSION_NUMBER, GIT_HASH_LONG and GIT_HASH on first use,
+    so importing the package does not run git
+    """
+    if name == 'PKG_VERSION_NUMBER':
+        value = return_pkg_version()
+    elif name == 'GIT_HASH_LONG':
+        from esupy.util import get_git_hash
+        value = os.environ.get('GITHUB_SHA') or get_git_hash('long')
+    elif name == 'GIT_HASH':
+        git_hash_long = __getattr__('GIT_HASH_LONG')
+        value = git_hash_long[0:7] if git_hash_long else None
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # store the value so it is only resolved once
+    globals()[name] = value
+    return value
 
 # Common declaration of write format for package data products
 WRITE_FORMAT = "csv"
 
-
+# Maximum number and total size (bytes) of output files kept in the LFG
+# output directory, least recently used files are deleted first. None for
+# no limit
+LFG_CACHE_MAX_FILES = None
+LFG_CACHE_MAX_BYTES = None
+
+# Number of landfill operation years in the precomputed LFG collection
+# efficiency matrix, doubled as needed for longer calculations
+COLLECTION_EFFICIENCY_HORIZON = 512
+
+# Accepted range (exclusive lower, inclusive upper bound) of material decay
+# rates, k, and the tolerance of the sum of the material ratios, used by
+# validation.validate_configs()
+DECAY_RATE_BOUNDS = (0, 1)
+MATERIAL_RATIO_TOLERANCE = 1e-6
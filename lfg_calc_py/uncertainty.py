@@ -0,0 +1,173 @@
+"""
+Monte Carlo uncertainty analysis of landfill methane generation, capture,
+and emissions. Model parameters are sampled from distributions and all
+draws are evaluated as batched arrays with the first order decay eqn,
+rather than calling calculate_lfg_emissions() once per draw.
+
+Distributions are defined in a dictionary keyed by parameter, either
+passed to monte_carlo() or under the "uncertainty" key of the method
+yaml, e.g.
+
+uncertainty:
+  degradable_organic_carbon: {distribution: triangular, low: 0.15, high: 0.2}
+  methane_oxidation_fraction: {distribution: uniform, low: 0, high: 0.35}
+  collection_efficiency: {distribution: normal, sd: 0.05}
+  decay_rates:
+    Food Waste: {distribution: triangular, low: 0.1, high: 0.4}
+    Corrugated Containers: {distribution: uniform, low: 0.75, high: 1.25, relative: True}
+
+Supported distributions are "uniform" (low, high), "triangular" (low, mode,
+high) and "normal" (mean, sd). The mode and mean default to the value in
+the method yaml. If "relative" is True, the sampled values are multipliers
+of the method yaml value. Collection efficiency is always sampled as a
+multiplier of the collection scenario curve.
+"""
+import numpy as np
+import pandas as pd
+
+from lfg_calc_py import common, fod
+from lfg_calc_py.lfg_calc_py import LFG
+from lfg_calc_py.lfg_log import log
+
+
+def sample_parameter(spec, base, n, rng):
+    """
+    Sample a parameter from a distribution
+    :param spec: dict, distribution specification
+    :param base: float, value of the parameter in the method yaml
+    :param n: int, number of draws
+    :param rng: np.random.Generator
+    :return: np.array of shape (n,)
+    """
+    relative = spec.get('relative', False)
+    centre = 1 if relative else base
+    distribution = spec.get('distribution')
+    if distribution == 'uniform':
+        draws = rng.uniform(spec['low'], spec['high'], n)
+    elif distribution == 'triangular':
+        draws = rng.triangular(spec['low'], spec.get('mode', centre),
+                               spec['high'], n)
+    elif distribution == 'normal':
+        # truncate at zero, all sampled parameters are non-negative
+        draws = np.clip(rng.normal(spec.get('mean', centre), spec['sd'], n),
+                        0, None)
+    else:
+        raise ValueError(f'{distribution} is not a supported distribution, '
+                         f'use "uniform", "triangular" or "normal"')
+    return draws * base if relative else draws
+
+
+def ipcc_decay_rate_range(waste_type, climate_zone, precipitation):
+    """
+    Return the IPCC low, default, and high methane generation rates (k) for
+    a waste type, e.g. to define a triangular decay rate distribution
+    :param waste_type: str, 'Type of Waste' in IPCC_Waste_specific_k-values
+    :param climate_zone: str, 'Climate Zone' in IPCC_Waste_specific_k-values
+    :param precipitation: str, 'Precipitation' in
+        IPCC_Waste_specific_k-values
+    :return: dict with 'low', 'mode' and 'high' keys
+    """
+    df = common.load_data_csv('IPCC_Waste_specific_k-values')
+    df = df[(df['Type of Waste'] == waste_type)
+            & (df['Climate Zone'] == climate_zone)
+            & (df['Precipitation'] == precipitation)]
+    k = df.set_index('Default/Range')['Methane Generation Rate (k)']
+    if not {'Low', 'Default', 'High'}.issubset(k.index):
+        raise KeyError(f'IPCC decay rates not found for {waste_type}, '
+                       f'{climate_zone}, {precipitation}')
+    return {'low': float(k['Low']), 'mode': float(k['Default']),
+            'high': float(k['High'])}
+
+
+def monte_carlo(
+        config: dict,
+        distributions: dict = None,
+        n_draws: int = 1000,
+        percentiles: list = (5, 50, 95),
+        seed: int = None,
+        chunk_size: int = 250
+) -> pd.DataFrame:
+    """
+    Run a Monte Carlo analysis of the total methane generation, capture, and
+    emissions of a landfill
+    :param config: dict, method configuration
+    :param distributions: dict, parameter distributions, defaults to the
+        "uncertainty" key in the method configuration
+    :param n_draws: int, number of draws
+    :param percentiles: list of percentiles to return for each year
+    :param seed: int, seed for the random number generator, results are
+        reproducible for a given seed regardless of chunk_size
+    :param chunk_size: int, number of draws evaluated at once, bounds the
+        memory used by the (draw, material, year) arrays
+    :return: df with the mean and percentiles of each metric by year
+    """
+    if distributions is None:
+        distributions = config.get('uncertainty', {})
+    unknown = set(distributions) - {*common.FRACTION_PARAMETERS,
+                                    'collection_efficiency', 'decay_rates'}
+    if unknown:
+        raise KeyError(f'Distributions not supported for {sorted(unknown)}')
+
+    lfg = LFG(config=config)
+    inputs = lfg.return_fod_inputs()
+    materials = inputs['materials']
+    keep = ~np.isnan(inputs['efficiency'])
+    log.info(f'Running {n_draws} Monte Carlo draws for '
+             f'{len(distributions)} parameters')
+
+    # sample all parameters up front so results do not depend on chunk_size
+    rng = np.random.default_rng(seed)
+
+    def sample(name, base):
+        if name in distributions:
+            return sample_parameter(distributions[name], base, n_draws, rng)
+        return np.full(n_draws, float(base))
+
+    potential = fod.CH4_C_RATIO * np.prod(
+        [sample(p, config.get(p)) for p in common.POTENTIAL_PARAMETERS],
+        axis=0)
+    oxidation = sample('methane_oxidation_fraction',
+                       config.get('methane_oxidation_fraction'))
+    efficiency_scale = (
+        sample_parameter(distributions['collection_efficiency'], 1,
+                         n_draws, rng)
+        if 'collection_efficiency' in distributions else np.ones(n_draws))
+    decay_rate_specs = distributions.get('decay_rates', {})
+    missing = set(decay_rate_specs) - set(materials)
+    if missing:
+        raise KeyError(f'Decay rate distributions defined for materials not '
+                       f'in material_ratios: {sorted(missing)}')
+    decay_rates = np.column_stack([
+        sample_parameter(decay_rate_specs[m], k, n_draws, rng)
+        if m in decay_rate_specs else np.full(n_draws, k)
+        for m, k in zip(materials, inputs['decay_rates'])])
+
+    # (material, year) methane generation potential of the waste
+    waste = inputs['material_waste']
+    efficiency = inputs['efficiency']
+
+    totals = {metric: np.empty((n_draws, keep.sum()))
+              for metric in common.METRICS}
+    for start in range(0, n_draws, chunk_size):
+        d = slice(start, min(start + chunk_size, n_draws))
+        results = fod.total_generation_capture_and_emissions(
+            waste, potential[d], decay_rates[d],
+            np.clip(efficiency_scale[d, np.newaxis] * efficiency, 0, 1),
+            oxidation[d])
+        for metric, values in zip(common.METRICS, results):
+            totals[metric][d] = values[:, keep]
+
+    operation_years = np.arange(inputs['T'])[keep]
+    data = {'Year': inputs['year_init'] + operation_years,
+            'landfillOperationYear': operation_years}
+    for metric in common.METRICS:
+        data[f'Total {metric} Mean'] = totals[metric].mean(axis=0)
+        for p, values in zip(percentiles,
+                             np.percentile(totals[metric], percentiles,
+                                           axis=0)):
+            data[f'Total {metric} P{p:g}'] = values
+    df = pd.DataFrame(data)
+    df['Unit'] = config.get("unit")
+    df['LFG Collection Scenario'] = config.get("LFG_collection_scenario")
+
+    return df
@@ -1,18 +1,331 @@
 """
-Functions used to validate models
+Validation of method configurations before calculation. The parameters of
+every configuration in a batch are flattened into arrays and checked
+together, so all problems are reported up front, by facility, rather than
+as an error partway through a calculation, e.g.
+
+problems = validate_configs(configs)
+check_configs(configs)  # raises ValueError listing every problem
 """
-# from lfg_calc_py.landfill_script import landfill_capacity
-#
-# # Checking to see if landfill has reached max capacity for the year of calculation
-# def check_if_landfill_is_full(current_capacity):
-#     if 0 < current_capacity < landfill_capacity:
-#         return current_capacity
-#     else:
-#         raise ValueError("The landfill is over its maximum waste capacity")
-#
-# # Checking to see if k is within accepted limits
-# def check_k(k): #TODO: update function to pull from dataframe
-#     if 0 < k < 0.5:
-#         return k
-#     else:
-#         raise ValueError("The methane generation rate constant k is outside conventional parameters")
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from lfg_calc_py import common, settings
+
+YEAR_PARAMETERS = ['calc_year', 'landfill_close', 'landfill_lifespan']
+REQUIRED_PARAMETERS = ['waste_acceptance_rate',
+                       'material_ratios',
+                       'LFG_collection_scenario',
+                       'unit',
+                       *common.FRACTION_PARAMETERS]
+
+
+def _number(value):
+    """
+    Return a value as a float, or nan if it is not a number
+    """
+    if isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _is_int(value):
+    """
+    Return True if a value is an int, and not a bool
+    """
+    return (isinstance(value, (int, np.integer))
+            and not isinstance(value, bool))
+
+
+def _year_range(key):
+    """
+    Return the first and last year of a waste acceptance key, a year or a
+    range of years, e.g. "2000-2010"
+    :raises ValueError: if the key is not an integer year or range of years
+    """
+    if _is_int(key):
+        return int(key), int(key)
+    match = (re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', key)
+             if isinstance(key, str) else None)
+    if match is None:
+        raise ValueError(f'{key} is not a year or range of years')
+    y1, y2 = match.groups()
+    return int(y1), int(y2 or y1)
+
+
+def validate_configs(configs: dict | list) -> pd.DataFrame:
+    """
+    Check method configurations for missing or invalid parameters, years or
+    year keys that are not whole numbers, material ratios that do not sum to
+    1, materials without a decay rate, decay rates outside
+    settings.DECAY_RATE_BOUNDS, and overlapping or out of order waste
+    acceptance years
+    :param configs: dict of method configurations keyed by facility, or a
+        list of method configurations
+    :return: df with a row for each problem, with Facility, Parameter and
+        Problem columns, empty if all configurations are valid
+    """
+    if not isinstance(configs, dict):
+        configs = dict(enumerate(configs))
+    facilities = list(configs)
+    config_list = list(configs.values())
+    problems = []
+
+    def report(rows, parameter, messages):
+        if isinstance(messages, str):
+            messages = [messages] * len(rows)
+        problems.extend((int(f), parameter, m) for f, m in zip(rows, messages))
+
+    report([f for f, c in enumerate(config_list) if not isinstance(c, dict)],
+           'config', 'is not a dictionary')
+    valid = [f for f, c in enumerate(config_list) if isinstance(c, dict)]
+    config_list = [c if isinstance(c, dict) else {} for c in config_list]
+
+    for p in REQUIRED_PARAMETERS:
+        report([f for f in valid if config_list[f].get(p) is None], p,
+               'is required')
+    report([f for f in valid
+            if not any(config_list[f].get(p) is not None for p in
+                       YEAR_PARAMETERS)],
+           'landfill_lifespan',
+           'is required if calc_year and landfill_close are not set')
+    for p in YEAR_PARAMETERS:
+        report([f for f in valid if config_list[f].get(p) is not None
+                and not _is_int(config_list[f][p])], p,
+               'must be a whole number of years')
+
+    # fractions
+    for p in common.FRACTION_PARAMETERS:
+        raw = [config_list[f].get(p) for f in valid]
+        values = np.array([_number(v) for v in raw])
+        rows = np.array(valid, dtype=int)
+        given = np.array([v is not None for v in raw], dtype=bool)
+        report(rows[given & np.isnan(values)], p, 'is not a number')
+        with np.errstate(invalid='ignore'):
+            outside = (values < 0) | (values > 1)
+        report(rows[outside], p,
+               [f'{v} is not between 0 and 1' for v in values[outside]])
+
+    # collection scenario
+    scenarios = list(common.load_collection_efficiency_matrix()[0])
+    report([f for f in valid
+            if config_list[f].get('LFG_collection_scenario') is not None
+            and config_list[f]['LFG_collection_scenario'] not in scenarios],
+           'LFG_collection_scenario',
+           f'is not a supported scenario, use one of {scenarios}')
+
+    # waste acceptance, flattened to one row per key
+    w_facility, w_start, w_end, w_value = [], [], [], []
+    for f in valid:
+        waste = config_list[f].get('waste_acceptance_rate')
+        if waste is None:
+            continue
+        if not isinstance(waste, dict) or not waste:
+            report([f], 'waste_acceptance_rate',
+                   'must be a dictionary of waste keyed by year')
+            continue
+        try:
+            value = np.array(list(waste.values()), dtype=float)
+        except (TypeError, ValueError):
+            value = np.array([_number(v) for v in waste.values()])
+        if set(map(type, waste)) == {int}:
+            # keys are usually single years
+            start = end = np.array(list(waste), dtype=int)
+        else:
+            ranges = {}
+            for i, key in enumerate(waste):
+                try:
+                    ranges[i] = _year_range(key)
+                except ValueError:
+                    report([f], 'waste_acceptance_rate',
+                           f'{key} is not a year or range of years')
+            start = np.array([r[0] for r in ranges.values()], dtype=int)
+            end = np.array([r[1] for r in ranges.values()], dtype=int)
+            value = value[list(ranges)]
+        w_facility.append(np.full(len(start), f))
+        w_start.append(start)
+        w_end.append(end)
+        w_value.append(value)
+    w_facility = np.concatenate([np.zeros(0, dtype=int), *w_facility])
+    w_start = np.concatenate([np.zeros(0, dtype=int), *w_start])
+    w_end = np.concatenate([np.zeros(0, dtype=int), *w_end])
+    w_value = np.concatenate([np.zeros(0), *w_value])
+    with np.errstate(invalid='ignore'):
+        bad = np.isnan(w_value) | (w_value < 0)
+    report(w_facility[bad], 'waste_acceptance_rate',
+           [f'{s} is not a non-negative number' if s == e
+            else f'{s}-{e} is not a non-negative number'
+            for s, e in zip(w_start[bad], w_end[bad])])
+    bad = w_end < w_start
+    report(w_facility[bad], 'waste_acceptance_rate',
+           [f'{s}-{e} ends before it starts'
+            for s, e in zip(w_start[bad], w_end[bad])])
+    # years overlapping the previous key of the facility
+    order = np.lexsort((w_start, w_facility))
+    f_sorted, s_sorted, e_sorted = (w_facility[order], w_start[order],
+                                    w_end[order])
+    overlap = np.flatnonzero((f_sorted[1:] == f_sorted[:-1])
+                             & (s_sorted[1:] <= e_sorted[:-1])) + 1
+    report(f_sorted[overlap], 'waste_acceptance_rate',
+           [f'year {s} is listed more than once'
+            for s in s_sorted[overlap]])
+    # the first key listed is the first year of the calculation, so
+    # earlier years would be dropped
+    if len(w_facility):
+        first = np.r_[True, w_facility[1:] != w_facility[:-1]]
+        year_init = np.zeros(len(config_list), dtype=int)
+        year_init[w_facility[first]] = w_start[first]
+        earlier = np.unique(w_facility[w_start < year_init[w_facility]])
+        report(earlier, 'waste_acceptance_rate',
+               'years must be listed in ascending order')
+        calc_year = np.array([
+            _number(config_list[f].get('calc_year',
+                                       config_list[f].get('landfill_close')))
+            for f in w_facility[first]])
+        with np.errstate(invalid='ignore'):
+            ends_early = calc_year <= w_start[first]
+        report(w_facility[first][ends_early], 'calc_year',
+               'must be after the first year of waste acceptance')
+
+    # material ratios, flattened to one row per facility, listed year (for
+    # ratios that vary by year), and material
+    r_group, r_material, r_ratio = [], [], []
+    # facility and label of each set of ratios that must sum to 1
+    g_facility, g_label = [], []
+    for f in valid:
+        ratios = config_list[f].get('material_ratios')
+        if ratios is None:
+            continue
+        if not isinstance(ratios, dict) or not ratios:
+            report([f], 'material_ratios',
+                   'must be a dictionary of fractions keyed by material')
+            continue
+        if common.is_time_varying(ratios):
+            by_year = {}
+            for key, year_ratios in ratios.items():
+                try:
+                    _year_range(key)
+                except ValueError:
+                    report([f], 'material_ratios',
+                           f'{key} is not a year or range of years')
+                    continue
+                if not isinstance(year_ratios, dict) or not year_ratios:
+                    report([f], 'material_ratios',
+                           f'{key} must be a dictionary of fractions keyed '
+                           f'by material')
+                    continue
+                by_year[f'{key} '] = year_ratios
+        else:
+            by_year = {'': ratios}
+        for label, year_ratios in by_year.items():
+            r_group.extend([len(g_facility)] * len(year_ratios))
+            r_material.extend(year_ratios)
+            r_ratio.extend(_number(v) for v in year_ratios.values())
+            g_facility.append(f)
+            g_label.append(label)
+    r_group = np.array(r_group, dtype=int)
+    r_material = np.array(r_material, dtype=object)
+    r_ratio = np.array(r_ratio, dtype=float)
+    g_facility = np.array(g_facility, dtype=int)
+    g_label = np.array(g_label, dtype=object)
+    with np.errstate(invalid='ignore'):
+        bad = np.isnan(r_ratio) | (r_ratio < 0) | (r_ratio > 1)
+    report(g_facility[r_group[bad]], 'material_ratios',
+           [f'{label}{m} is not between 0 and 1'
+            for label, m in zip(g_label[r_group[bad]], r_material[bad])])
+    totals = np.bincount(r_group, weights=np.nan_to_num(r_ratio),
+                         minlength=len(g_facility))
+    off = np.flatnonzero(np.abs(totals - 1)
+                         > settings.MATERIAL_RATIO_TOLERANCE)
+    report(g_facility[off], 'material_ratios',
+           [f'{g_label[g]}sum to {totals[g]:.6g}, not 1' for g in off])
+
+    # materials, one row per facility and material
+    pairs = list(dict.fromkeys(zip(g_facility[r_group].tolist(),
+                                   r_material.tolist())))
+    m_facility = np.array([f for f, _ in pairs], dtype=int)
+    m_material = np.array([m for _, m in pairs], dtype=object)
+
+    # decay rates, from material_decay_rates if set, otherwise the default
+    # source
+    not_dict = [f for f in valid if 'material_decay_rates' in config_list[f]
+                and not isinstance(config_list[f]['material_decay_rates'],
+                                   dict)]
+    report(not_dict, 'material_decay_rates',
+           'must be a dictionary of decay rates keyed by material')
+    k = np.full(len(m_facility), np.nan)
+    no_rate = np.zeros(len(m_facility), dtype=bool)
+    user = np.array([isinstance(config_list[f].get('material_decay_rates'),
+                                dict) for f in m_facility], dtype=bool)
+    # materials of facilities with invalid material_decay_rates are not
+    # looked up in the default source
+    m_set = np.array(['material_decay_rates' in config_list[f]
+                      for f in m_facility], dtype=bool)
+    for i in np.flatnonzero(user):
+        rate = config_list[m_facility[i]]['material_decay_rates'].get(
+            m_material[i])
+        k[i] = _number(rate)
+        no_rate[i] = rate is None
+    source = np.array([config_list[f].get('default_decay_rates')
+                       for f in m_facility], dtype=object)
+    moisture = np.array([config_list[f].get('moisture_conditions')
+                         for f in m_facility], dtype=object)
+    for s in pd.unique(source[~m_set]):
+        rows = np.flatnonzero(~m_set & (source == s))
+        if s not in common.DECAY_RATE_SOURCES:
+            report(np.unique(m_facility[rows]), 'default_decay_rates',
+                   f'{s} is not a supported source of default decay rates '
+                   f'and material_decay_rates are not set, use one of '
+                   f'{list(common.DECAY_RATE_SOURCES)}')
+            continue
+        lookup = pd.Series(common.load_decay_rate_lookup(s))
+        conditions = set(lookup.index.get_level_values(1))
+        bad_moisture = np.array([m not in conditions for m in moisture[rows]],
+                                dtype=bool)
+        report(np.unique(m_facility[rows[bad_moisture]]),
+               'moisture_conditions',
+               f'is not one of {sorted(conditions)}')
+        rows = rows[~bad_moisture]
+        position = lookup.index.get_indexer(pd.MultiIndex.from_arrays(
+            [m_material[rows], moisture[rows]]))
+        k[rows[position >= 0]] = lookup.to_numpy()[position[position >= 0]]
+        no_rate[rows[position < 0]] = True
+    report(m_facility[no_rate], 'material_decay_rates',
+           [f'no decay rate for {m}' for m in m_material[no_rate]])
+    not_number = user & ~no_rate & np.isnan(k)
+    report(m_facility[not_number], 'material_decay_rates',
+           [f'{m} is not a number' for m in m_material[not_number]])
+    low, high = settings.DECAY_RATE_BOUNDS
+    with np.errstate(invalid='ignore'):
+        outside = (k <= low) | (k > high)
+    report(m_facility[outside], 'material_decay_rates',
+           [f'{v} for {m} is outside ({low}, {high}]'
+            for m, v in zip(m_material[outside], k[outside])])
+
+    df = pd.DataFrame(problems, columns=['Facility', 'Parameter', 'Problem'])
+    df = df.sort_values('Facility', kind='stable', ignore_index=True)
+    df['Facility'] = np.array(facilities, dtype=object)[
+        df['Facility'].to_numpy(dtype=int)]
+    return df
+
+
+def check_configs(configs: dict | list) -> None:
+    """
+    Raise a ValueError listing every problem found by validate_configs()
+    :param configs: dict of method configurations keyed by facility, or a
+        list of method configurations
+    """
+    problems = validate_configs(configs)
+    if len(problems):
+        lines = [f'{f}: {p} {m}' for f, p, m in problems.itertuples(
+            index=False)]
+        raise ValueError(f'{len(problems)} problems found in '
+                         f'{problems["Facility"].nunique()} method '
+                         f'configurations:\n' + '\n'.join(lines))
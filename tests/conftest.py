@@ -0,0 +1,25 @@
+"""
+Shared fixtures of the lfg_calc_py tests
+"""
+from copy import deepcopy
+
+import pytest
+
+from lfg_calc_py import lfg_log, settings
+
+
+@pytest.fixture
+def output_paths(tmp_path, monkeypatch):
+    """
+    Write LFG output, metadata and logs to a temporary directory rather than
+    the local data directory
+    :return: Path, the temporary output directory
+    """
+    paths = deepcopy(settings.paths)
+    paths.local_path = tmp_path / 'lfg-calc-py'
+    monkeypatch.setattr(settings, 'paths', paths)
+    monkeypatch.setattr(settings, 'outputpath', paths.local_path)
+    monkeypatch.setattr(settings, 'lfgoutputpath', paths.local_path / 'LFG')
+    monkeypatch.setattr(settings, 'logoutputpath', paths.local_path / 'Logs')
+    monkeypatch.setattr(lfg_log, 'logoutputpath', paths.local_path / 'Logs')
+    return paths.local_path
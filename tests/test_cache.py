@@ -0,0 +1,96 @@
+"""
+Tests of the LRU eviction of saved LFG output
+"""
+import os
+from pathlib import Path
+
+import lfg_calc_py
+from lfg_calc_py import cache
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def write_outputs(folder, n):
+    """
+    Write n output files and their metadata, the first least recently used
+    """
+    folder.mkdir(exist_ok=True)
+    files = []
+    for i in range(n):
+        file = folder / f'method_{i}_v0.1.0.csv'
+        file.write_text('Year\n2023\n')
+        cache.metadata_file(file).write_text('{}')
+        os.utime(file, (i, i))
+        files.append(file)
+    return files
+
+
+def test_evicts_least_recently_used(tmp_path):
+    files = write_outputs(tmp_path / 'LFG', 4)
+    deleted = cache.evict_lfg_output(max_files=2, folder=tmp_path / 'LFG')
+    assert sorted(deleted) == files[:2]
+    assert sorted((tmp_path / 'LFG').iterdir()) == sorted(
+        [*files[2:], *[cache.metadata_file(f)
+                       for f in files[2:]]])
+
+
+def test_files_deleted_by_another_process_are_ignored(tmp_path,
+                                                      monkeypatch):
+    files = write_outputs(tmp_path / 'LFG', 4)
+    iterdir = Path.iterdir
+
+    def iterdir_then_delete(self):
+        # another process evicts the listed files before they are used
+        listed = list(iterdir(self))
+        for file in files[:2]:
+            file.unlink()
+            cache.metadata_file(file).unlink()
+        return iter(listed)
+
+    monkeypatch.setattr(Path, 'iterdir', iterdir_then_delete)
+    deleted = cache.evict_lfg_output(max_files=1, folder=tmp_path / 'LFG')
+    assert deleted == [files[2]]
+    assert not files[2].exists() and files[3].exists()
+
+
+def test_files_deleted_while_evicting_are_ignored(tmp_path, monkeypatch):
+    files = write_outputs(tmp_path / 'LFG', 4)
+    unlink = Path.unlink
+
+    def delete_then_unlink(self, *args, **kwargs):
+        # another process deletes the file first
+        if self.exists():
+            os.remove(self)
+        unlink(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, 'unlink', delete_then_unlink)
+    deleted = cache.evict_lfg_output(max_files=1, folder=tmp_path / 'LFG')
+    assert sorted(deleted) == files[:3]
+    assert sorted((tmp_path / 'LFG').iterdir()) == [
+        files[3], cache.metadata_file(files[3])]
+
+
+def test_evicting_a_format_keeps_the_metadata_of_other_formats(tmp_path):
+    folder = tmp_path / 'LFG'
+    csv = write_outputs(folder, 1)[0]
+    parquet = csv.with_suffix('.parquet')
+    parquet.write_bytes(b'parquet')
+    cache.metadata_file(parquet).write_text('{}')
+    deleted = cache.evict_lfg_output(max_files=1, folder=folder)
+    assert deleted == [csv]
+    assert sorted(folder.iterdir()) == sorted(
+        [parquet, cache.metadata_file(parquet)])
+
+
+def test_alternating_formats_load_saved_output(output_paths, monkeypatch):
+    for write_format in ['csv', 'parquet']:
+        lfg_calc_py.getLFGCalculations(METHOD, write_format=write_format)
+
+    def generate(*args, **kwargs):
+        raise AssertionError('saved output was regenerated')
+
+    monkeypatch.setattr(LFG, 'generateLFG', generate)
+    for write_format in ['csv', 'parquet', 'csv']:
+        df = lfg_calc_py.getLFGCalculations(METHOD, write_format=write_format)
+        assert len(df) > 1
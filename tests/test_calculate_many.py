@@ -0,0 +1,49 @@
+"""
+Tests that the batch calculation of many landfills reproduces the
+calculation of each landfill on its own
+"""
+import pandas as pd
+import pytest
+
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHODS = ['Landfill_Example_Single_Year_Acceptance',
+           'Landfill_Example_Year_Range_Acceptance',
+           'Landfill_Example_Multi_Year_Acceptance']
+SCENARIOS = ['Typical', 'Worst-case', 'Aggressive', 'California', False]
+
+# every method and scenario in one batch, so facilities differ in their
+# years, horizons and materials
+CONFIGS = {f'{method} {scenario}': {**common.load_yaml_dict(method),
+                                    'LFG_collection_scenario': scenario}
+           for method in METHODS for scenario in SCENARIOS}
+
+
+@pytest.fixture(scope='module')
+def batch():
+    return LFG.calculate_many(CONFIGS)
+
+
+def sort_rows(df):
+    """
+    Order rows by year and material, as materials are ordered across all
+    facilities in a batch
+    :param df: long format df of LFG output
+    :return: df with object Material, Unit and LFG Collection Scenario
+    """
+    return (df.astype({c: object for c in ['Material', 'Unit',
+                                           'LFG Collection Scenario']})
+            .sort_values(['Year', 'Material'])
+            .reset_index(drop=True))
+
+
+@pytest.mark.parametrize('facility', CONFIGS)
+def test_calculate_many_matches_calculate_lfg_emissions(batch, facility):
+    config = {**CONFIGS[facility], 'output_layout': 'long'}
+    expected = pd.DataFrame(LFG(config=config).calculate_lfg_emissions().data)
+    result = batch[batch['Facility'] == facility].drop(columns='Facility')
+    assert len(result) > 1
+    pd.testing.assert_frame_equal(sort_rows(result), sort_rows(expected),
+                                  check_dtype=False, check_exact=False,
+                                  rtol=1e-9, atol=0)
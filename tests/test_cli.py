@@ -0,0 +1,88 @@
+"""
+Tests of loading methods for the lfg-calc command line interface
+"""
+import shutil
+
+import pandas as pd
+
+from lfg_calc_py import cli, settings, validation
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def test_manifest_replaces_year_of_method_yaml(tmp_path):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD], 'name': ['site'],
+                  'waste_acceptance_rate.2023': ['150000']}
+                 ).to_csv(manifest, index=False)
+    configs, errors = cli.load_manifest(manifest)
+    assert not errors
+    assert configs['site']['waste_acceptance_rate'] == {2023: 150000}
+    assert validation.validate_configs(configs).empty
+
+
+def test_manifest_adds_year_to_method_yaml(tmp_path):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD], 'name': ['site'],
+                  'waste_acceptance_rate.2024': ['50000']}
+                 ).to_csv(manifest, index=False)
+    configs, errors = cli.load_manifest(manifest)
+    assert not errors
+    assert len(configs['site']['waste_acceptance_rate']) == 2
+    assert validation.validate_configs(configs).empty
+
+
+def test_manifest_reports_unparseable_value(tmp_path):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD, METHOD], 'name': ['good', 'bad'],
+                  'landfill_lifespan': ['50', '[50']}
+                 ).to_csv(manifest, index=False)
+    configs, errors = cli.load_manifest(manifest)
+    assert list(configs) == ['good']
+    assert list(errors) == ['bad']
+
+
+def test_run_reports_unparseable_yaml(tmp_path, output_paths, capsys):
+    methods = tmp_path / 'methods'
+    methods.mkdir()
+    shutil.copy(settings.methodpath / f'{METHOD}.yaml',
+                methods / 'good.yaml')
+    (methods / 'bad.yaml').write_text('waste_acceptance_rate: [2023\n')
+    assert cli.main(['run', str(methods), '--workers', '1']) == 1
+    table = capsys.readouterr().out.splitlines()
+    status = dict(line.split()[:2] for line in table[1:])
+    assert status == {'good': 'success', 'bad': 'failed'}
+
+
+def test_manifest_reports_unknown_method(tmp_path):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD, 'Unknown_Method'],
+                  'name': ['good', 'unknown']}
+                 ).to_csv(manifest, index=False)
+    configs, errors = cli.load_manifest(manifest)
+    assert list(configs) == ['good']
+    assert 'Unknown_Method' in errors['unknown']
+
+
+def test_manifest_reports_parameter_under_a_value(tmp_path):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD], 'name': ['site'],
+                  'landfill_lifespan.x': ['1']}
+                 ).to_csv(manifest, index=False)
+    configs, errors = cli.load_manifest(manifest)
+    assert not configs
+    assert 'landfill_lifespan is not a dictionary' in errors['site']
+
+
+def test_run_reports_manifest_errors_by_site(tmp_path, output_paths,
+                                             capsys):
+    manifest = tmp_path / 'sites.csv'
+    pd.DataFrame({'method': [METHOD, 'Unknown_Method', METHOD],
+                  'name': ['good', 'unknown', 'nested'],
+                  'landfill_lifespan.x': ['', '', '1']}
+                 ).to_csv(manifest, index=False)
+    assert cli.main(['run', str(manifest), '--workers', '1']) == 1
+    table = capsys.readouterr().out.splitlines()
+    status = dict(line.split()[:2] for line in table[1:])
+    assert status == {'good': 'success', 'unknown': 'failed',
+                      'nested': 'failed'}
@@ -0,0 +1,36 @@
+"""
+Tests that the closed-form cumulative totals equal the sums of the annual
+emissions
+"""
+import numpy as np
+import pytest
+
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+# through years during waste acceptance, after the last year of waste
+# acceptance, and the lifetime totals (None)
+CASES = [('Landfill_Example_Year_Range_Acceptance', 2005),
+         ('Landfill_Example_Year_Range_Acceptance', 2040),
+         ('Landfill_Example_Year_Range_Acceptance', None),
+         ('Landfill_Example_Multi_Year_Acceptance', 2018),
+         ('Landfill_Example_Multi_Year_Acceptance', 2060),
+         ('Landfill_Example_Multi_Year_Acceptance', None),
+         ('Landfill_Example_Single_Year_Acceptance', 2030),
+         ('Landfill_Example_Single_Year_Acceptance', None)]
+
+
+@pytest.mark.parametrize('method, through_year', CASES)
+def test_cumulative_totals_match_annual_sums(method, through_year):
+    config = common.load_yaml_dict(method)
+    annual = LFG(config=config).calculate_lfg_emissions().data
+    if through_year is not None:
+        annual = annual[annual['Year'] <= through_year]
+    cumulative = (LFG(config=config)
+                  .calculate_cumulative_emissions(through_year)
+                  .groupby('Material', observed=True)[common.METRICS].sum())
+    for material in common.return_materials(config['material_ratios']):
+        for metric in common.METRICS:
+            np.testing.assert_allclose(
+                cumulative.loc[material, metric],
+                annual[f'{material} {metric}'].sum(), rtol=1e-9)
@@ -0,0 +1,28 @@
+"""
+Tests that the numpy first order decay engine reproduces the reference
+pandas engine
+"""
+import pandas as pd
+import pytest
+
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHODS = ['Landfill_Example_Single_Year_Acceptance',
+           'Landfill_Example_Year_Range_Acceptance',
+           'Landfill_Example_Multi_Year_Acceptance']
+SCENARIOS = ['Typical', 'Worst-case', 'Aggressive', 'California', False]
+
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+@pytest.mark.parametrize('method', METHODS)
+def test_numpy_engine_matches_pandas_engine(method, scenario):
+    config = {**common.load_yaml_dict(method),
+              'LFG_collection_scenario': scenario}
+    expected = LFG(config=config).calculate_lfg_emissions(
+        engine='pandas').data
+    result = LFG(config=config).calculate_lfg_emissions(engine='numpy').data
+    assert len(result) > 1
+    pd.testing.assert_frame_equal(pd.DataFrame(result),
+                                  pd.DataFrame(expected),
+                                  check_exact=False, rtol=1e-9, atol=0)
@@ -0,0 +1,25 @@
+"""
+Tests of generating many methods in a process pool
+"""
+import shutil
+
+from lfg_calc_py import settings
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def test_unparseable_yaml_does_not_stop_other_methods(tmp_path,
+                                                      output_paths):
+    methods = tmp_path / 'methods'
+    methods.mkdir()
+    shutil.copy(settings.methodpath / f'{METHOD}.yaml',
+                methods / 'good.yaml')
+    (methods / 'bad.yaml').write_text('waste_acceptance_rate: [2023\n')
+    summary = LFG.generate_many(['good', 'bad'], workers=1,
+                                external_config_path=str(methods))
+    status = dict(zip(summary['Method'], summary['Status']))
+    assert status == {'good': 'success', 'bad': 'failed'}
+    error = summary.loc[summary['Method'] == 'bad', 'Error'].iloc[0]
+    assert 'Could not load method yaml' in error
+    assert list((output_paths / 'LFG').glob('good_*'))
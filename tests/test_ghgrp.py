@@ -0,0 +1,81 @@
+"""
+Tests of landfill methods from GHGRP Subpart HH tables, using the small
+fixture tables in tests/data/ghgrp
+"""
+from pathlib import Path
+
+import pytest
+
+from lfg_calc_py import ghgrp, validation
+from lfg_calc_py.lfg_calc_py import LFG
+
+TABLES = Path(__file__).parent / 'data' / 'ghgrp'
+
+
+@pytest.fixture
+def ghgrp_path(tmp_path, monkeypatch):
+    """
+    Cache the combined tables in a temporary directory
+    """
+    path = tmp_path / 'GHGRP'
+    monkeypatch.setattr(ghgrp, 'ghgrp_path', path)
+    return path
+
+
+def test_load_subpart_hh(ghgrp_path):
+    df = ghgrp.load_subpart_hh(TABLES)
+    assert (list(zip(df['Facility ID'], df['Year']))
+            == [('1001', 2010), ('1001', 2011), ('1001', 2012),
+                ('1002', 2010), ('1002', 2011), ('1003', 2010)])
+    # tables of each year are combined and resubmitted reports replaced
+    waste = df.set_index(['Facility ID', 'Year'])['Waste Disposal']
+    assert waste[('1001', 2011)] == 125000
+    assert waste[('1002', 2011)] == 90000
+    # several collection systems of a facility are summed
+    recovered = df.set_index(['Facility ID', 'Year'])['Methane Recovered']
+    assert recovered[('1001', 2011)] == 2000
+    assert list(df['Gas Collection']) == [False, True, True,
+                                          False, False, False]
+
+
+def test_second_load_reads_cache(ghgrp_path, monkeypatch):
+    df = ghgrp.load_subpart_hh(TABLES)
+    assert len(list(ghgrp_path.glob('Subpart_HH_*.parquet'))) == 1
+
+    def read_table(files, columns):
+        raise AssertionError('tables were read rather than the cache')
+
+    monkeypatch.setattr(ghgrp, 'read_table', read_table)
+    cached = ghgrp.load_subpart_hh(TABLES)
+    assert cached.equals(df)
+    with pytest.raises(AssertionError):
+        ghgrp.load_subpart_hh(TABLES, use_cache=False)
+
+
+def test_return_facility_configs(ghgrp_path):
+    configs = ghgrp.return_facility_configs(TABLES)
+    # facilities without reported waste disposal are dropped
+    assert list(configs) == ['GHGRP_1001', 'GHGRP_1002']
+    collecting, not_collecting = configs.values()
+    assert collecting['waste_acceptance_rate'] == {
+        2010: 120000, 2011: 125000, 2012: 130000}
+    assert not_collecting['waste_acceptance_rate'] == {2010: 80000,
+                                                       2011: 90000}
+    # facilities reporting a gas collection system use the template scenario
+    assert collecting['LFG_recovery'] is True
+    assert collecting['LFG_collection_scenario'] == 'Typical'
+    assert not_collecting['LFG_recovery'] is False
+    assert not_collecting['LFG_collection_scenario'] is False
+    assert collecting['state'] == 'NC'
+    assert collecting['ghgrp'] == {
+        'facility_id': '1001', 'facility_name': 'Example County Landfill',
+        'methane_recovered': {2011: 2000.0, 2012: 2500.0}}
+
+
+def test_facility_configs_are_calculated(ghgrp_path):
+    configs = ghgrp.return_facility_configs(TABLES)
+    assert validation.validate_configs(configs).empty
+    df = LFG.calculate_many({'GHGRP_1001': configs['GHGRP_1001']})
+    assert set(df['Facility']) == {'GHGRP_1001'}
+    assert df['Year'].min() == 2010
+    assert (df['Methane Capture'] > 0).any()
@@ -0,0 +1,74 @@
+"""
+Importing lfg_calc_py must be fast and free of side effects, so short-lived
+jobs do not pay for git probing or directory creation
+"""
+import json
+import subprocess
+import sys
+
+# seconds to import lfg_calc_py, the fastest of IMPORT_RUNS imports, each in
+# a new interpreter
+IMPORT_TIME_BUDGET = 2.0
+IMPORT_RUNS = 3
+
+# records the subprocesses started and the directories created while
+# importing the package, and the import time
+IMPORT_SCRIPT = """
+import json
+import os
+import subprocess
+import time
+
+commands, directories = [], []
+popen_init = subprocess.Popen.__init__
+mkdir = os.mkdir
+
+def record_popen(self, args, *a, **kw):
+    commands.append(args if isinstance(args, str) else ' '.join(map(str, args)))
+    popen_init(self, args, *a, **kw)
+
+def record_mkdir(path, *a, **kw):
+    directories.append(os.fspath(path))
+    mkdir(path, *a, **kw)
+
+subprocess.Popen.__init__ = record_popen
+os.mkdir = record_mkdir
+
+start = time.perf_counter()
+import lfg_calc_py
+seconds = time.perf_counter() - start
+
+from lfg_calc_py import settings
+print(json.dumps({'seconds': seconds, 'commands': commands,
+                  'directories': directories,
+                  'outputpath': str(settings.outputpath)}))
+"""
+
+
+def import_package():
+    """
+    Import lfg_calc_py in a new interpreter
+    :return: dict, the import time, commands run and directories created
+    """
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT],
+                            capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_import_time_budget():
+    seconds = min(import_package()['seconds'] for _ in range(IMPORT_RUNS))
+    assert seconds < IMPORT_TIME_BUDGET, (
+        f'importing lfg_calc_py took {seconds:.2f} s, the budget is '
+        f'{IMPORT_TIME_BUDGET} s')
+
+
+def test_import_does_not_run_git():
+    commands = import_package()['commands']
+    assert not [c for c in commands if 'git' in c], commands
+
+
+def test_import_does_not_create_output_directories():
+    result = import_package()
+    created = [d for d in result['directories']
+               if d.startswith(result['outputpath'])]
+    assert not created, created
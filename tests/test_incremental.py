@@ -0,0 +1,87 @@
+"""
+Tests that updating saved output incrementally gives the same results as
+recalculating every year
+"""
+import pandas as pd
+import pytest
+
+import lfg_calc_py
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Multi_Year_Acceptance'
+NAME = 'Incremental_Site'
+
+
+@pytest.fixture
+def full_calculations(monkeypatch):
+    """
+    Count the calls to calculate_lfg_emissions(), which recalculates every
+    year
+    """
+    calls = []
+    calculate = LFG.calculate_lfg_emissions
+
+    def count_calls(self, *args, **kwargs):
+        calls.append(self)
+        return calculate(self, *args, **kwargs)
+
+    monkeypatch.setattr(LFG, 'calculate_lfg_emissions', count_calls)
+    return calls
+
+
+def recalculated(config):
+    """
+    Return the emissions of a configuration, recalculating every year
+    """
+    return pd.DataFrame(LFG(config=config).calculate_lfg_emissions().data)
+
+
+def assert_frame_close(result, expected):
+    pd.testing.assert_frame_equal(pd.DataFrame(result).reset_index(drop=True),
+                                  expected.reset_index(drop=True),
+                                  check_exact=False, rtol=1e-9, atol=1e-9)
+
+
+def updated_configs():
+    config = common.load_yaml_dict(METHOD)
+    appended = {**config, 'waste_acceptance_rate': {
+        **config['waste_acceptance_rate'], 2022: 99000, 2023: 101000}}
+    extended = {**config, 'calc_year': config['calc_year'] + 20}
+    return config, appended, extended
+
+
+@pytest.mark.parametrize('update', ['appended', 'extended', 'both'])
+def test_incremental_update_matches_recalculation(output_paths,
+                                                  full_calculations, update):
+    config, appended, extended = updated_configs()
+    new_config = {'appended': appended, 'extended': extended,
+                  'both': {**appended,
+                           'calc_year': extended['calc_year']}}[update]
+    LFG.generateLFG(NAME, config=config)
+    full_calculations.clear()
+    lfg = LFG.generateLFG(NAME, config=new_config, incremental=True)
+    assert not full_calculations
+    assert_frame_close(lfg.data, recalculated(new_config))
+
+
+def test_changed_earlier_year_recalculates(output_paths, full_calculations):
+    config = common.load_yaml_dict(METHOD)
+    changed = {**config, 'waste_acceptance_rate': {
+        **config['waste_acceptance_rate'], 2016: 50000}}
+    LFG.generateLFG(NAME, config=config)
+    full_calculations.clear()
+    lfg = LFG.generateLFG(NAME, config=changed, incremental=True)
+    assert len(full_calculations) == 1
+    assert_frame_close(lfg.data, recalculated(changed))
+
+
+def test_get_calculations_updates_incrementally(output_paths,
+                                                full_calculations):
+    config, appended, _ = updated_configs()
+    lfg_calc_py.getLFGCalculations(NAME, config=config)
+    full_calculations.clear()
+    df = lfg_calc_py.getLFGCalculations(NAME, config=appended,
+                                        incremental=True)
+    assert not full_calculations
+    assert_frame_close(df, recalculated(appended))
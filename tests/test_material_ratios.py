@@ -0,0 +1,44 @@
+"""
+Tests of material ratios that vary by year of waste acceptance
+"""
+import pandas as pd
+
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Year_Range_Acceptance'
+CHANGE_YEAR = 2005
+
+
+def calculate(material_ratios):
+    """
+    Calculate the example method with the given material ratios
+    :param material_ratios: dict, material_ratios of the method
+    :return: wide df of LFG output
+    """
+    config = {**common.load_yaml_dict(METHOD),
+              'material_ratios': material_ratios}
+    return pd.DataFrame(LFG(config=config).calculate_lfg_emissions().data)
+
+
+def test_constant_ratios_by_year_match_static_ratios():
+    ratios = common.load_yaml_dict(METHOD)['material_ratios']
+    expected = calculate(ratios)
+    result = calculate({'1990-1999': ratios, 2000: ratios,
+                        '2010': dict(ratios)})
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_ratio_change_only_affects_later_waste():
+    ratios = common.load_yaml_dict(METHOD)['material_ratios']
+    changed = {'Mixed MSW': 0.2, 'Food Waste': 0.7, 'Yard Trimmings': 0.1}
+    static = calculate(ratios)
+    varying = calculate({1990: ratios, CHANGE_YEAR: changed})
+    # methane is generated in the years after the waste is deposited
+    before = static['Year'] <= CHANGE_YEAR
+    pd.testing.assert_frame_equal(varying[before], static[before],
+                                  check_exact=True)
+    for material in ratios:
+        column = f'{material} Methane Generation'
+        assert (varying.loc[~before, column].to_numpy()
+                != static.loc[~before, column].to_numpy()).all()
@@ -0,0 +1,26 @@
+"""
+Tests that long format LFG output pivots back to the wide layout
+"""
+import pandas as pd
+import pytest
+
+from lfg_calc_py import common
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHODS = ['Landfill_Example_Single_Year_Acceptance',
+           'Landfill_Example_Year_Range_Acceptance',
+           'Landfill_Example_Multi_Year_Acceptance']
+SCENARIOS = ['Typical', 'Worst-case', 'Aggressive', 'California', False]
+
+
+@pytest.mark.parametrize('scenario', SCENARIOS)
+@pytest.mark.parametrize('method', METHODS)
+def test_pivoted_long_layout_matches_wide_layout(method, scenario):
+    config = {**common.load_yaml_dict(method),
+              'LFG_collection_scenario': scenario}
+    wide = pd.DataFrame(LFG(config=config).calculate_lfg_emissions().data)
+    long = LFG(config={**config, 'output_layout': 'long'}
+               ).calculate_lfg_emissions().data
+    assert len(wide) > 1
+    pd.testing.assert_frame_equal(common.pivot_lfg_emissions(long), wide,
+                                  check_exact=True)
@@ -0,0 +1,31 @@
+"""
+Tests of the per-stage timing and memory of profiled calculations
+"""
+import numpy as np
+
+from lfg_calc_py import profiling
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def test_peak_memory_is_measured_per_stage():
+    profile = profiling.Profile()
+    with profile.span('outer'):
+        with profile.span('large'):
+            np.ones(50 * 1024 ** 2 // 8).sum()
+        with profile.span('small'):
+            np.ones(1024).sum()
+    peaks = profile.to_frame().set_index('Stage')['Peak memory (MB)']
+    assert peaks['large'] >= 50
+    # a stage after a large allocation does not report its peak
+    assert peaks['small'] < 1
+    assert peaks['outer'] >= peaks['large']
+
+
+def test_generate_profile(output_paths):
+    lfg = LFG.generateLFG(METHOD, profile=True)
+    summary = lfg.profile.summary()
+    assert {'load method yaml', 'calculate emissions', 'write output'} <= set(
+        summary['Stage'])
+    assert (summary['Peak memory (MB)'] >= 0).all()
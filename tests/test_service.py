@@ -0,0 +1,66 @@
+"""
+Tests of the what-if calculation service, without starting the server
+"""
+import asyncio
+import json
+
+import pytest
+
+from lfg_calc_py import common
+from lfg_calc_py.service import Service, merge_config
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def test_merge_config_replaces_year_given_as_str():
+    config = merge_config(common.load_yaml_dict(METHOD),
+                          {'waste_acceptance_rate': {'2023': 150000}})
+    assert config['waste_acceptance_rate'] == {2023: 150000}
+
+
+def test_merge_config_replaces_material_ratios():
+    ratios = {'Food Waste': 0.5, 'Newspaper': 0.5}
+    config = merge_config(common.load_yaml_dict(METHOD),
+                          {'material_ratios': ratios})
+    assert config['material_ratios'] == ratios
+
+
+def test_merge_config_replaces_material_ratios_by_year():
+    ratios = {'2000-2009': {'Food Waste': 1},
+              2010: {'Food Waste': 0.4, 'Newspaper': 0.6}}
+    config = merge_config(common.load_yaml_dict(METHOD),
+                          {'material_ratios': ratios})
+    assert config['material_ratios'] == ratios
+
+
+@pytest.mark.parametrize('ratios', [{'Food Waste': 0.5},
+                                    {2000: {'Food Waste': 0.5},
+                                     2010: {'Food Waste': 1}},
+                                    {'Food Waste': 'half'},
+                                    []])
+def test_merge_config_rejects_material_ratios(ratios):
+    with pytest.raises(ValueError, match='material_ratios'):
+        merge_config(common.load_yaml_dict(METHOD),
+                     {'material_ratios': ratios})
+
+
+def test_calculate_with_year_given_as_str():
+    # the executor is created by serve(), calculate in the default executor
+    body = {'method': METHOD,
+            'config': {'LFG_collection_scenario': 'Aggressive',
+                       'waste_acceptance_rate': {'2023': 150000}}}
+    status, response = asyncio.run(Service().respond(
+        'POST', '/calculate', json.dumps(body).encode()))
+    assert status == 200, response
+    result = json.loads(response)['result']
+    assert result['data']
+
+
+def test_calculate_rejects_material_ratios_not_summing_to_1():
+    body = {'method': METHOD,
+            'config': {'material_ratios': {'Food Waste': 0.5}}}
+    status, response = asyncio.run(Service().respond(
+        'POST', '/calculate', json.dumps(body).encode()))
+    assert status == 400
+    assert json.loads(response)['error'] == (
+        'material_ratios sum to 0.5, not 1')
@@ -0,0 +1,53 @@
+"""
+Tests of the validation of method configurations before calculation
+"""
+import pytest
+
+from lfg_calc_py import common, validation
+from lfg_calc_py.lfg_calc_py import LFG
+
+METHOD = 'Landfill_Example_Single_Year_Acceptance'
+
+
+def example_config(**parameters):
+    """
+    Return the example method configuration with replaced parameters
+    """
+    return {**common.load_yaml_dict(METHOD), **parameters}
+
+
+def test_example_is_valid():
+    assert validation.validate_configs([example_config()]).empty
+
+
+@pytest.mark.parametrize('parameters, parameter', [
+    ({'calc_year': '2050'}, 'calc_year'),
+    ({'landfill_close': 2050.5}, 'landfill_close'),
+    ({'landfill_lifespan': True}, 'landfill_lifespan'),
+    ({'material_decay_rates': [1]}, 'material_decay_rates'),
+    ({'waste_acceptance_rate': {2020.5: 1000}}, 'waste_acceptance_rate'),
+    ({'waste_acceptance_rate': {'2020.5-2030': 1000}},
+     'waste_acceptance_rate'),
+    ({'material_ratios': {2020: {'Food Waste': 1},
+                          2030.5: {'Food Waste': 1}}}, 'material_ratios'),
+])
+def test_invalid_parameter_is_reported(parameters, parameter):
+    problems = validation.validate_configs({'site': example_config(
+        **parameters)})
+    assert parameter in set(problems['Parameter']), problems
+    with pytest.raises(ValueError, match=parameter):
+        LFG.calculate_many({'site': example_config(**parameters)})
+
+
+def test_year_ranges_are_valid():
+    config = example_config(waste_acceptance_rate={'2000-2009': 1000,
+                                                   2010: 2000,
+                                                   '2011': 3000})
+    assert validation.validate_configs([config]).empty
+
+
+def test_year_as_int_and_str_is_listed_more_than_once():
+    config = example_config(waste_acceptance_rate={2023: 1000,
+                                                   '2023': 2000})
+    problems = validation.validate_configs([config])
+    assert list(problems['Problem']) == ['year 2023 is listed more than once']